@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistiques de réponses des candidats (difficulté des questions, distracteurs)
+
+Les résultats exportés par l'application sont lus en flux, au format NDJSON
+(un objet JSON par ligne, fichiers .gz acceptés). Une ligne est soit un
+QuizResult complet (``answers`` : liste de UserAnswer), soit un UserAnswer
+seul ({"questionId": ..., "selectedAnswers": [...]}) ; les ids sont ceux de
+la banque (src/data/questions_complete.json).
+
+Chaque réponse est réduite à un couple (id de question, masque des options
+cochées) ; les couples sont accumulés par lots et comptés en une opération
+NumPy par lot dans des tableaux indexés par id de question : tentatives,
+réponses justes et choix de chaque option. Les totaux par famille de code
+(RSP, AEMC, ...) s'en déduisent. Les lignes mal formées, les réponses à
+une question inconnue ou qui cochent une option inexistante sont écartées
+et comptées ; une question de la banque dont une bonne réponse n'est pas
+une de ses options est ignorée et signalée (voir validate_quiz.py).
+
+Rapports produits :
+- difficulté : taux d'échec de chaque question, lissé vers le taux moyen
+  pour les questions peu répondues, et par famille de code ;
+- distracteurs : mauvaises options les plus souvent cochées.
+
+    python answer_stats.py resultats.ndjson                       # résumé sur stdout
+    python answer_stats.py export-*.ndjson.gz --report stats.json --csv difficulte.csv
+    python answer_stats.py resultats.ndjson --write-back          # champ difficulty dans la banque
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+
+import numpy as np
+
+import instrumentation
+from export_bundles import code_family
+from quiz_model import load_quiz
+from quiz_writer import write_quiz
+
+DEFAULT_BANK = "src/data/questions_complete.json"
+
+# Réponses comptées ensemble (une opération NumPy par lot)
+BATCH_SIZE = 1 << 16
+
+# Tentatives en dessous desquelles la difficulté d'une question n'est pas publiée
+DEFAULT_MIN_ATTEMPTS = 20
+# Poids du taux de réussite moyen dans le lissage : une question répondue
+# PRIOR_WEIGHT fois a une difficulté à mi-chemin entre la sienne et la moyenne
+PRIOR_WEIGHT = 5
+# Part des tentatives à partir de laquelle une mauvaise option est signalée
+DEFAULT_DISTRACTOR_RATE = 0.2
+DEFAULT_TOP = 10
+
+# Raisons de rejet d'une réponse ou d'une ligne
+REJECT_LINE = "ligne invalide"
+REJECT_QUESTION = "question inconnue"
+REJECT_OPTION = "option inconnue"
+
+def open_results(path):
+    """Fichier de résultats en binaire ; '-' lit l'entrée standard, .gz est décompressé."""
+    if path == '-':
+        return sys.stdin.buffer
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+class AnswerStats:
+    """Compteurs de réponses d'une banque de questions (QuizQuestion), indexés par id de question."""
+
+    def __init__(self, questions):
+        questions = list(questions)
+        size = max((question.id for question in questions), default=0) + 1
+        width = max((len(question.options) for question in questions), default=0)
+        self.questions = {}
+        # Questions dont une bonne réponse n'est pas une option : ignorées
+        self.skipped_questions = []
+
+        # Option -> bit du masque des options cochées, par question
+        self._option_bits = {}
+        self.correct_mask = np.zeros(size, dtype=np.int64)
+        self.option_count = np.zeros(size, dtype=np.int64)
+        self.family_names = []
+        families = {}
+        self.family_of = np.full(size, -1, dtype=np.int64)
+        for question in questions:
+            question_id = question.id
+            bits = {option.id: 1 << position for position, option in enumerate(question.options)}
+            if any(answer not in bits for answer in question.correct_answers):
+                self.skipped_questions.append(question_id)
+                continue
+            self.questions[question_id] = question
+            self._option_bits[question_id] = bits
+            self.correct_mask[question_id] = sum(bits[answer] for answer in question.correct_answers)
+            self.option_count[question_id] = len(bits)
+            family = code_family(question.code)
+            if family not in families:
+                families[family] = len(self.family_names)
+                self.family_names.append(family)
+            self.family_of[question_id] = families[family]
+
+        self.attempts = np.zeros(size, dtype=np.int64)
+        self.correct = np.zeros(size, dtype=np.int64)
+        # picks[id, position] : nombre de réponses ayant coché l'option
+        self.picks = np.zeros((size, width), dtype=np.int64)
+        self.results = 0
+        self.rejected = {REJECT_LINE: 0, REJECT_QUESTION: 0, REJECT_OPTION: 0}
+
+        self._pending_ids = []
+        self._pending_masks = []
+
+    def add_answer(self, question_id, selected):
+        """Ajoute une réponse (UserAnswer) au lot en cours."""
+        # Un id non entier (liste, true, 1.0) planterait ou serait compté sous la question 1
+        if not isinstance(question_id, int) or isinstance(question_id, bool):
+            self.rejected[REJECT_QUESTION] += 1
+            return
+        bits = self._option_bits.get(question_id)
+        if bits is None:
+            self.rejected[REJECT_QUESTION] += 1
+            return
+        if not isinstance(selected, list):
+            # Une chaîne serait lue caractère par caractère ("12" -> options 1 et 2)
+            self.rejected[REJECT_OPTION] += 1
+            return
+        mask = 0
+        try:
+            # Les ids d'options sont des chaînes : tout autre élément lève KeyError ou TypeError
+            for option_id in selected:
+                mask |= bits[option_id]
+        except (KeyError, TypeError):
+            self.rejected[REJECT_OPTION] += 1
+            return
+        self._pending_ids.append(question_id)
+        self._pending_masks.append(mask)
+        if len(self._pending_ids) >= BATCH_SIZE:
+            self.flush()
+
+    def add_record(self, record):
+        """Ajoute une ligne d'export : QuizResult (liste answers) ou UserAnswer seul."""
+        if not isinstance(record, dict):
+            self.rejected[REJECT_LINE] += 1
+            return
+        answers = record.get('answers')
+        if answers is None:
+            if 'questionId' not in record:
+                self.rejected[REJECT_LINE] += 1
+                return
+            answers = (record,)
+        elif not isinstance(answers, list):
+            self.rejected[REJECT_LINE] += 1
+            return
+        else:
+            self.results += 1
+        add_answer = self.add_answer
+        for answer in answers:
+            if isinstance(answer, dict):
+                add_answer(answer.get('questionId'), answer.get('selectedAnswers'))
+            else:
+                self.rejected[REJECT_LINE] += 1
+
+    def flush(self):
+        """Compte le lot en cours dans les tableaux."""
+        if not self._pending_ids:
+            return
+        with instrumentation.stage("stats.count"):
+            ids = np.array(self._pending_ids, dtype=np.int64)
+            masks = np.array(self._pending_masks, dtype=np.int64)
+            self._pending_ids = []
+            self._pending_masks = []
+
+            size = len(self.attempts)
+            self.attempts += np.bincount(ids, minlength=size)
+            self.correct += np.bincount(ids[masks == self.correct_mask[ids]], minlength=size)
+            for position in range(self.picks.shape[1]):
+                chosen = (masks >> position) & 1 == 1
+                self.picks[:, position] += np.bincount(ids[chosen], minlength=size)
+        instrumentation.count("stats.answers", len(ids))
+
+    def read(self, path):
+        """Lit un fichier de résultats NDJSON ; retourne le nombre de lignes lues."""
+        lines = 0
+        loads = json.loads
+        with instrumentation.stage("stats.read"):
+            f = open_results(path)
+            try:
+                for line in f:
+                    if line.isspace():
+                        continue
+                    lines += 1
+                    try:
+                        record = loads(line)
+                    except ValueError:
+                        self.rejected[REJECT_LINE] += 1
+                        continue
+                    self.add_record(record)
+            finally:
+                if f is not sys.stdin.buffer:
+                    f.close()
+        self.flush()
+        return lines
+
+    @property
+    def answers(self):
+        """Nombre de réponses comptées."""
+        return int(self.attempts.sum())
+
+    def mean_success(self):
+        """Taux de réussite moyen sur toutes les réponses comptées."""
+        total = self.attempts.sum()
+        return float(self.correct.sum() / total) if total else 0.0
+
+    def difficulty(self):
+        """Difficulté de chaque question (tableau indexé par id) : taux d'échec lissé.
+
+        Le taux de réussite est tiré vers la moyenne avec un poids de
+        PRIOR_WEIGHT réponses, pour qu'une question répondue deux fois ne
+        passe pas pour la plus facile ou la plus difficile de la banque.
+        """
+        success = (self.correct + PRIOR_WEIGHT * self.mean_success()) / (self.attempts + PRIOR_WEIGHT)
+        return 1.0 - success
+
+    def question_stats(self, min_attempts=DEFAULT_MIN_ATTEMPTS):
+        """Statistiques des questions répondues au moins `min_attempts` fois, les plus difficiles d'abord."""
+        difficulty = self.difficulty()
+        ids = np.flatnonzero(self.attempts >= max(min_attempts, 1))
+        ids = ids[np.argsort(-difficulty[ids], kind='stable')]
+
+        stats = []
+        for question_id in ids.tolist():
+            question = self.questions[question_id]
+            attempts = int(self.attempts[question_id])
+            correct_ids = set(question.correct_answers)
+            stats.append({
+                "id": question_id,
+                "code": question.code or '',
+                "family": self.family_names[self.family_of[question_id]],
+                "attempts": attempts,
+                "correct": int(self.correct[question_id]),
+                "success_rate": round(int(self.correct[question_id]) / attempts, 4),
+                "difficulty": round(float(difficulty[question_id]), 4),
+                "options": [{"id": option.id,
+                             "correct": option.id in correct_ids,
+                             "picks": int(self.picks[question_id, position]),
+                             "rate": round(int(self.picks[question_id, position]) / attempts, 4)}
+                            for position, option in enumerate(question.options)],
+            })
+        return stats
+
+    def family_stats(self):
+        """Totaux par famille de code, les plus échouées d'abord."""
+        known = self.family_of >= 0
+        families = self.family_of[known]
+        count = len(self.family_names)
+        questions = np.bincount(families, minlength=count)
+        answered = np.bincount(families, weights=self.attempts[known] > 0, minlength=count)
+        attempts = np.bincount(families, weights=self.attempts[known], minlength=count)
+        correct = np.bincount(families, weights=self.correct[known], minlength=count)
+
+        stats = []
+        for index, name in enumerate(self.family_names):
+            stats.append({
+                "family": name,
+                "questions": int(questions[index]),
+                "answered": int(answered[index]),
+                "attempts": int(attempts[index]),
+                "correct": int(correct[index]),
+                "failure_rate": round(1 - correct[index] / attempts[index], 4) if attempts[index] else None,
+            })
+        stats.sort(key=lambda family: -1 if family["failure_rate"] is None else family["failure_rate"],
+                   reverse=True)
+        return stats
+
+    def distractors(self, question_stats, min_rate=DEFAULT_DISTRACTOR_RATE):
+        """Mauvaises options cochées dans au moins `min_rate` des tentatives, les plus fréquentes d'abord."""
+        found = []
+        for question in question_stats:
+            for option in question["options"]:
+                if not option["correct"] and option["rate"] >= min_rate:
+                    found.append({"id": question["id"], "code": question["code"],
+                                  "option": option["id"], "picks": option["picks"], "rate": option["rate"],
+                                  "text": self.questions[question["id"]].option(option["id"]).text})
+        found.sort(key=lambda distractor: distractor["rate"], reverse=True)
+        return found
+
+    def report(self, min_attempts=DEFAULT_MIN_ATTEMPTS, distractor_rate=DEFAULT_DISTRACTOR_RATE):
+        """Rapport complet (sérialisable) : totaux, familles, questions et distracteurs."""
+        questions = self.question_stats(min_attempts)
+        return {
+            "results": self.results,
+            "answers": self.answers,
+            "rejected": dict(self.rejected),
+            "skipped_questions": list(self.skipped_questions),
+            "mean_success": round(self.mean_success(), 4),
+            "min_attempts": min_attempts,
+            "families": self.family_stats(),
+            "questions": questions,
+            "distractors": self.distractors(questions, distractor_rate),
+        }
+
+def write_csv(path, question_stats):
+    """Écrit le rapport de difficulté par question en CSV."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "code", "family", "attempts", "correct", "success_rate", "difficulty",
+                         "top_distractor", "top_distractor_rate"])
+        for question in question_stats:
+            wrong = [option for option in question["options"] if not option["correct"]]
+            top = max(wrong, key=lambda option: option["rate"], default=None)
+            writer.writerow([question["id"], question["code"], question["family"], question["attempts"],
+                             question["correct"], question["success_rate"], question["difficulty"],
+                             top["id"] if top else "", top["rate"] if top else ""])
+
+def write_back(bank_path, quiz, question_stats):
+    """Écrit le champ difficulty des questions assez répondues dans la banque.
+
+    Les questions sans difficulté publiée perdent une éventuelle valeur
+    précédente ; retourne le nombre de questions mises à jour.
+    """
+    difficulty = {question["id"]: question["difficulty"] for question in question_stats}
+    for question in quiz.questions:
+        question.difficulty = difficulty.get(question.id)
+    write_quiz(bank_path, quiz.title, quiz.questions, quiz.description)
+    return len(difficulty)
+
+def print_summary(report, top):
+    """Affiche les familles et les questions les plus échouées."""
+    rejected = sum(report["rejected"].values())
+    print(f"📊 {report['answers']} réponses ({report['results']} résultats), "
+          f"réussite moyenne {report['mean_success']:.1%}, {rejected} écartées")
+    for reason, count in report["rejected"].items():
+        if count:
+            print(f"   {reason}: {count}")
+    if report["skipped_questions"]:
+        print(f"⚠️  {len(report['skipped_questions'])} questions ignorées (bonne réponse absente des options, "
+              f"voir validate_quiz.py) : {', '.join(map(str, report['skipped_questions']))}")
+
+    print("\nFamilles les plus échouées :")
+    for family in report["families"]:
+        if family["failure_rate"] is not None:
+            print(f"   {family['family']:<8} {family['failure_rate']:6.1%} d'échec "
+                  f"({family['attempts']} réponses, {family['answered']}/{family['questions']} questions)")
+
+    print(f"\nQuestions les plus difficiles (au moins {report['min_attempts']} réponses) :")
+    for question in report["questions"][:top]:
+        print(f"   {question['difficulty']:.2f}  {question['code']:<10} "
+              f"{question['correct']}/{question['attempts']} justes")
+
+    if report["distractors"]:
+        print("\nDistracteurs les plus choisis :")
+        for distractor in report["distractors"][:top]:
+            print(f"   {distractor['rate']:6.1%}  {distractor['code']:<10} option {distractor['option']} : "
+                  f"{distractor['text'][:60]}")
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Statistiques de réponses des quiz EPSF")
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help="résultats NDJSON (.gz accepté, '-' pour stdin, par défaut)")
+    parser.add_argument('--bank', default=DEFAULT_BANK,
+                        help=f"banque de questions des résultats (défaut : {DEFAULT_BANK})")
+    parser.add_argument('--min-attempts', type=int, default=DEFAULT_MIN_ATTEMPTS,
+                        help=f"réponses minimales pour publier une difficulté (défaut : {DEFAULT_MIN_ATTEMPTS})")
+    parser.add_argument('--distractor-rate', type=float, default=DEFAULT_DISTRACTOR_RATE,
+                        help=f"part des tentatives à partir de laquelle signaler une mauvaise option "
+                             f"(défaut : {DEFAULT_DISTRACTOR_RATE})")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP,
+                        help=f"lignes affichées par classement (défaut : {DEFAULT_TOP})")
+    parser.add_argument('--report', help="fichier JSON où écrire le rapport complet")
+    parser.add_argument('--csv', help="fichier CSV où écrire la difficulté par question")
+    parser.add_argument('--write-back', action='store_true',
+                        help="écrire le champ difficulty dans la banque")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    quiz = load_quiz(args.bank)
+
+    with instrumentation.session(args), instrumentation.stage("stats.run"):
+        stats = AnswerStats(quiz.questions)
+        for path in args.inputs:
+            stats.read(path)
+        report = stats.report(args.min_attempts, args.distractor_rate)
+
+    print_summary(report, args.top)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Rapport: {args.report}")
+    if args.csv:
+        write_csv(args.csv, report["questions"])
+        print(f"📝 Difficulté par question: {args.csv}")
+    if args.write_back:
+        updated = write_back(args.bank, quiz, report["questions"])
+        print(f"✅ Difficulté écrite pour {updated} questions dans {args.bank}")
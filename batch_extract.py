@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Extraction par lots de plusieurs PDF EPSF (modules de licence, révisions annuelles)
+
+Les pages de tous les documents sont réparties en tranches sur un même pool
+de processus : le temps total dépend du nombre de cœurs, pas du nombre de
+documents. Une boucle asyncio soumet les tranches (en nombre borné), puis
+écrit la banque de chaque document dès que ses pages sont extraites, dans
+un thread, pendant que les autres documents occupent encore le pool.
+
+Chaque PDF produit sa propre banque, nommée d'après le fichier
+(src/data/banks/<nom>.json) ; les images, nommées par hash de contenu, sont
+partagées dans public/images/. Une banque fusionnée peut être produite en
+plus (--merged).
+
+    python batch_extract.py pdfs/                       # tous les PDF d'un répertoire
+    python batch_extract.py 'pdfs/module-*.pdf' --workers 8 --merged src/data/questions_lots.json
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+import instrumentation
+from extract_pdf_data import EPSFPDFExtractor
+from quiz_model import QuizQuestion
+from quiz_writer import write_quiz
+
+DEFAULT_BANKS_DIR = Path("src/data/banks")
+DEFAULT_PUBLIC_DIR = Path("public")
+# Pages par tranche soumise au pool
+CHUNK_PAGES = 16
+# Tranches en attente par processus (borne la file de l'exécuteur)
+PENDING_PER_WORKER = 2
+
+SLUG_PATTERN = re.compile(r'[^a-z0-9]+')
+
+def bank_name(pdf_path: Path) -> str:
+    """Nom de la banque d'un PDF : nom du fichier sans accents, en minuscules."""
+    text = unicodedata.normalize('NFKD', pdf_path.stem)
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return SLUG_PATTERN.sub('-', text).strip('-') or "document"
+
+def resolve_pdfs(inputs: List[str]) -> List[Path]:
+    """PDF désignés par des répertoires, des chemins ou des motifs glob (sans doublon)."""
+    pdfs = []
+    seen = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = sorted(str(path) for path in Path(pattern).glob("*.pdf"))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        for match in matches:
+            resolved = Path(match).resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                pdfs.append(Path(match))
+    return pdfs
+
+# Extracteurs ouverts par chaque processus du pool : chemin du PDF -> extracteur
+_worker_extractors: Dict[str, EPSFPDFExtractor] = {}
+_worker_output_dir = str(DEFAULT_PUBLIC_DIR)
+
+def _init_worker(output_dir: str, instrumented: bool):
+    """Initialiser un processus du pool."""
+    global _worker_output_dir
+    _worker_output_dir = output_dir
+    instrumentation.enable(instrumented)
+    # Les processus du pool ne passent pas par atexit : les documents sont
+    # fermés par le finaliseur de multiprocessing, à la sortie du processus
+    Finalize(None, _close_worker_extractors, exitpriority=10)
+
+def _close_worker_extractors():
+    """Fermer les documents ouverts par ce processus."""
+    for extractor in _worker_extractors.values():
+        extractor.close()
+    _worker_extractors.clear()
+
+def _extract_chunk(pdf_path: str, page_numbers: List[int]) -> Tuple[List[Optional[QuizQuestion]], Dict[str, Any]]:
+    """Extraire une tranche de pages d'un PDF ; chaque document n'est ouvert qu'une fois par processus."""
+    extractor = _worker_extractors.get(pdf_path)
+    if extractor is None:
+        extractor = _worker_extractors[pdf_path] = EPSFPDFExtractor(pdf_path, _worker_output_dir)
+    instrumentation.reset()
+    results = [extractor.process_page(page_num) for page_num in page_numbers]
+    return results, instrumentation.snapshot()
+
+async def _extract_pdf(pool: ProcessPoolExecutor, pending: asyncio.Semaphore, pdf_path: Path,
+                       banks_dir: Path) -> Dict[str, Any]:
+    """Extraire toutes les pages d'un PDF via le pool, puis écrire sa banque."""
+    loop = asyncio.get_running_loop()
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    async def run_chunk(pages):
+        async with pending:
+            results, measures = await loop.run_in_executor(pool, _extract_chunk, str(pdf_path), pages)
+        instrumentation.merge(measures)
+        return results
+
+    chunks = [list(range(start, min(start + CHUNK_PAGES, page_count)))
+              for start in range(0, page_count, CHUNK_PAGES)]
+    results = await asyncio.gather(*(run_chunk(pages) for pages in chunks))
+    questions = [question for chunk in results for question in chunk if question]
+
+    # Écriture dans un thread : les autres documents continuent d'occuper le pool
+    name = bank_name(pdf_path)
+    output = banks_dir / f"{name}.json"
+    with instrumentation.stage("batch.write"):
+        await asyncio.to_thread(write_quiz, output, f"Quiz de Révision EPSF - {pdf_path.stem}", questions)
+    print(f"✅ {pdf_path.name} : {len(questions)} questions ({page_count} pages) -> {output}")
+    return {"pdf": str(pdf_path), "bank": str(output), "pages": page_count, "questions": len(questions)}
+
+async def extract_batch(pdfs: List[Path], banks_dir: Path = DEFAULT_BANKS_DIR,
+                        public_dir: Path = DEFAULT_PUBLIC_DIR, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Extraire plusieurs PDF en parallèle ; retourne un résumé par document."""
+    names = {}
+    for pdf_path in pdfs:
+        name = bank_name(pdf_path)
+        if name in names:
+            raise ValueError(f"{pdf_path} et {names[name]} produiraient la même banque '{name}'")
+        names[name] = pdf_path
+
+    banks_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    pending = asyncio.Semaphore(workers * PENDING_PER_WORKER)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(public_dir), instrumentation.is_enabled())) as pool:
+        return list(await asyncio.gather(*(_extract_pdf(pool, pending, pdf_path, banks_dir) for pdf_path in pdfs)))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Lire les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Extraction par lots de PDF EPSF")
+    parser.add_argument("inputs", nargs="+", help="répertoires, fichiers PDF ou motifs glob")
+    parser.add_argument("--banks-dir", default=str(DEFAULT_BANKS_DIR),
+                        help=f"répertoire des banques produites (défaut : {DEFAULT_BANKS_DIR})")
+    parser.add_argument("--public-dir", default=str(DEFAULT_PUBLIC_DIR),
+                        help="répertoire public où enregistrer les images (défaut : public)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--merged", help="fichier de quiz fusionnant toutes les banques produites")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    """Fonction principale."""
+    args = parse_args(argv)
+    pdfs = resolve_pdfs(args.inputs)
+    if not pdfs:
+        print("Erreur : aucun PDF trouvé.")
+        return 1
+
+    print(f"Extraction de {len(pdfs)} PDF...")
+    start = time.perf_counter()
+    with instrumentation.session(args):
+        summaries = asyncio.run(extract_batch(pdfs, Path(args.banks_dir), Path(args.public_dir), args.workers))
+
+        if args.merged:
+            from merge_questions import merge_questions
+            report = merge_questions([summary["bank"] for summary in summaries], args.merged)
+            if "error" in report:
+                return 1
+
+    total = sum(summary["questions"] for summary in summaries)
+    print(f"\n✅ {total} questions extraites de {len(pdfs)} PDF en {time.perf_counter() - start:.1f} s")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks du pipeline de données (extraction PDF, parsing, fusion, validation)
+
+Chaque benchmark s'exécute dans un processus séparé, hors ligne, sur
+public/epsf.pdf, les fichiers de src/data/ et des banques synthétiques de
+10 000 à 100 000 questions. Pour chacun on mesure :
+- le débit (meilleur temps sur plusieurs répétitions) ;
+- le pic de mémoire résidente (RSS) du processus ;
+- les allocations Python (pic tracemalloc, blocs alloués restants,
+  collectes du GC) lors d'une exécution instrumentée séparée.
+
+Les résultats sont comparés à la référence benchmarks/baseline.json (versionnée) ;
+sans référence, aucune comparaison n'est faite et --fail-on-regression
+échoue. Pour la régénérer (sur la machine de référence, tous les
+benchmarks aux tailles par défaut) puis comparer :
+
+    python benchmarks/bench_pipeline.py --save-baseline
+    python benchmarks/bench_pipeline.py --fail-on-regression
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PDF_PATH = ROOT / "public" / "epsf.pdf"
+DATA_DIR = ROOT / "src" / "data"
+BANK_PATH = DATA_DIR / "questions_complete.json"
+RAW_FILES = [DATA_DIR / "raw_data.txt", DATA_DIR / "raw_data2.txt"]
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.15
+
+# Nom -> (fonction de préparation, unité, synthétique)
+BENCHMARKS = {}
+
+def benchmark(name, unit, synthetic=False):
+    """Enregistre un benchmark.
+    
+    La fonction décorée prépare les données (hors mesure) et retourne une
+    fonction sans argument qui exécute le travail mesuré et retourne le
+    nombre d'unités traitées. Les benchmarks synthétiques reçoivent la
+    taille de banque voulue.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, unit, synthetic)
+        return setup
+    return register
+
+def quiet():
+    """Coupe la sortie standard des scripts mesurés."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+# --- Données synthétiques ---------------------------------------------------
+
+def load_bank():
+    """Questions de la banque de référence."""
+    with open(BANK_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)['quiz']['questions']
+
+def synthetic_questions(size, seed=0, offset=0):
+    """Banque de `size` questions (QuizQuestion) dérivées de la banque de référence.
+    
+    Les textes et codes sont suffixés pour que chaque question soit unique ;
+    `offset` décale la numérotation (pour créer des recouvrements).
+    """
+    from quiz_model import QuizQuestion
+    base = load_bank()
+    rng = random.Random(seed)
+    questions = []
+    for index in range(offset, offset + size):
+        source = base[index % len(base)]
+        question = json.loads(json.dumps(source))
+        question['id'] = index - offset + 1
+        question['question'] = f"{source['question']} (variante {index})"
+        question['code'] = f"{source.get('code', 'Q')}-{index}"
+        rng.shuffle(question['options'])
+        questions.append(QuizQuestion.from_dict(question))
+    return questions
+
+def write_synthetic_bank(path, size, seed=0, offset=0):
+    """Écrit une banque synthétique au format quiz."""
+    from quiz_writer import write_quiz
+    write_quiz(path, "Banque synthétique", synthetic_questions(size, seed, offset))
+
+def write_synthetic_raw(path, size):
+    """Écrit une banque synthétique au format raw_data (//////// entre les blocs)."""
+    base = load_bank()
+    with open(path, 'w', encoding='utf-8') as f:
+        for index in range(size):
+            source = base[index % len(base)]
+            f.write(f"{source['question']} (variante {index})\n")
+            for option in source['options']:
+                mark = ' XXX' if option['id'] in source['correctAnswers'] else ''
+                f.write(f"[]{option['text']}{mark}\n")
+            f.write(f"{source.get('code', 'Q')}-{index}\n////////\n")
+
+# --- Benchmarks ---------------------------------------------------------------
+
+@benchmark("pdf.get_text", "pages")
+def bench_pdf_text(size=None):
+    import fitz
+    doc = fitz.open(PDF_PATH)
+    
+    def run():
+        for page in doc:
+            page.get_text()
+        return len(doc)
+    return run
+
+@benchmark("pdf.images", "images")
+def bench_pdf_images(size=None):
+    from extract_pdf_data import EPSFPDFExtractor
+    
+    def run():
+        # Nouvel extracteur et répertoire vide : décodage et encodage complets
+        with tempfile.TemporaryDirectory() as tmp:
+            extractor = EPSFPDFExtractor(str(PDF_PATH), tmp)
+            count = sum(len(extractor.extract_images_from_page(page_num))
+                        for page_num in range(len(extractor.doc)))
+            extractor.close()
+        return count
+    return run
+
+@benchmark("pdf.parse_question_text", "pages")
+def bench_parse_question_text(size=None):
+    from extract_pdf_data import EPSFPDFExtractor
+    extractor = EPSFPDFExtractor(str(PDF_PATH), tempfile.mkdtemp())
+    texts = [extractor.extract_text_from_page(page_num) for page_num in range(len(extractor.doc))]
+    
+    def run():
+        for page_num, text in enumerate(texts):
+            extractor.parse_question_text(text, page_num)
+        return len(texts)
+    return run
+
+@benchmark("pdf.parse_page_layout", "pages")
+def bench_parse_page_layout(size=None):
+    from extract_pdf_data import EPSFPDFExtractor
+    output_dir = tempfile.mkdtemp()
+    extractor = EPSFPDFExtractor(str(PDF_PATH), output_dir, vector_cache_dir=str(Path(output_dir) / "vectors"))
+    
+    def run():
+        for page_num in range(len(extractor.doc)):
+            extractor.parse_page_layout(page_num)
+        return len(extractor.doc)
+    return run
+
+@benchmark("raw.parse", "questions")
+def bench_raw_parse(size=None):
+    from raw_data_parser import iter_file_questions
+    
+    def run():
+        return sum(1 for path in RAW_FILES for _ in iter_file_questions(str(path)))
+    return run
+
+@benchmark("raw.parse.synthetic", "questions", synthetic=True)
+def bench_raw_parse_synthetic(size):
+    from raw_data_parser import iter_file_questions
+    path = Path(tempfile.mkdtemp()) / "raw_synthetic.txt"
+    write_synthetic_raw(path, size)
+    
+    def run():
+        return sum(1 for _ in iter_file_questions(str(path)))
+    return run
+
+@benchmark("merge.synthetic", "questions", synthetic=True)
+def bench_merge_synthetic(size):
+    from merge_questions import merge_questions
+    tmp = Path(tempfile.mkdtemp())
+    # Deux banques de size/2 questions qui se recouvrent à 10 %
+    half = size // 2
+    write_synthetic_bank(tmp / "bank_a.json", half)
+    write_synthetic_bank(tmp / "bank_b.json", half, seed=1, offset=half - half // 10)
+    
+    def run():
+        with quiet():
+            report = merge_questions([str(tmp / "bank_*.json")], tmp / "merged.json")
+        return report["read"]
+    return run
+
+@benchmark("dedup.synthetic", "questions", synthetic=True)
+def bench_dedup_synthetic(size):
+    from near_duplicates import find_clusters
+    questions = synthetic_questions(size)
+    
+    def run():
+        find_clusters(questions)
+        return len(questions)
+    return run
+
+@benchmark("store.synthetic", "questions", synthetic=True)
+def bench_store_synthetic(size):
+    from question_store import QuestionStore, write_store
+    path = Path(tempfile.mkdtemp()) / "bank.qstore"
+    write_store(path, "Banque synthétique", "", synthetic_questions(size))
+    
+    def run():
+        # Ouverture, comptage par type, filtrage par code et accès direct
+        with QuestionStore(path) as store:
+            store.count_by_type()
+            sum(1 for _ in store.filter(code_prefix="RSP"))
+            store[len(store) // 2].to_dict()
+            return len(store)
+    return run
+
+@benchmark("model.load.synthetic", "questions", synthetic=True)
+def bench_model_load_synthetic(size):
+    from quiz_model import load_quiz
+    path = Path(tempfile.mkdtemp()) / "bank.json"
+    write_synthetic_bank(path, size)
+    
+    def run():
+        return len(load_quiz(path).questions)
+    return run
+
+@benchmark("stats.synthetic", "réponses", synthetic=True)
+def bench_stats_synthetic(size):
+    from answer_stats import AnswerStats
+    from quiz_model import QuizQuestion
+    questions = [QuizQuestion.from_dict(question) for question in load_bank()]
+    rng = random.Random(0)
+    path = Path(tempfile.mkdtemp()) / "results.ndjson"
+    # Résultats de 40 réponses, justes ou sur une option au hasard
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(size // 40):
+            answers = [{"questionId": question.id,
+                        "selectedAnswers": question.correct_answers if rng.random() < 0.7
+                        else [rng.choice(question.options).id]}
+                       for question in rng.sample(questions, 40)]
+            f.write(json.dumps({"score": 0, "totalQuestions": 40, "percentage": 0, "answers": answers}) + '\n')
+    
+    def run():
+        stats = AnswerStats(questions)
+        stats.read(str(path))
+        stats.report()
+        return stats.answers
+    return run
+
+@benchmark("validate.bank", "questions")
+def bench_validate_bank(size=None):
+    from validate_quiz import QuizValidator
+    
+    def run():
+        validator = QuizValidator(ROOT / "public")
+        return validator.validate_file(BANK_PATH)["stats"]["total"]
+    return run
+
+@benchmark("validate.synthetic", "questions", synthetic=True)
+def bench_validate_synthetic(size):
+    from validate_quiz import QuizValidator
+    path = Path(tempfile.mkdtemp()) / "bank.json"
+    write_synthetic_bank(path, size)
+    
+    def run():
+        validator = QuizValidator(ROOT / "public")
+        return validator.validate_file(path)["stats"]["total"]
+    return run
+
+# --- Exécution ----------------------------------------------------------------
+
+def measure(name, size, repeat):
+    """Exécute un benchmark dans le processus courant et retourne ses mesures."""
+    setup, unit, _ = BENCHMARKS[name]
+    run = setup(size)
+    
+    # Débit : meilleur temps sur `repeat` exécutions
+    best = None
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    # Allocations : une exécution instrumentée (plus lente, non chronométrée)
+    gc.collect()
+    collections_before = sum(stats['collections'] for stats in gc.get_stats())
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    run()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks_after = sys.getallocatedblocks()
+    collections_after = sum(stats['collections'] for stats in gc.get_stats())
+    
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        max_rss *= 1024
+    
+    return {
+        "name": name,
+        "size": size,
+        "unit": unit,
+        "items": items,
+        "seconds": best,
+        "throughput": items / best if best else 0.0,
+        "peak_rss_bytes": max_rss,
+        "alloc_peak_bytes": traced_peak,
+        "alloc_blocks": blocks_after - blocks_before,
+        "gc_collections": collections_after - collections_before,
+    }
+
+def result_key(result):
+    """Identifiant d'un résultat (nom et taille pour les synthétiques)."""
+    return f"{result['name']}[{result['size']}]" if result['size'] else result['name']
+
+def run_isolated(name, size, repeat):
+    """Exécute un benchmark dans un processus neuf (pic RSS propre à chacun)."""
+    command = [sys.executable, __file__, '--child', name, '--repeat', str(repeat)]
+    if size:
+        command += ['--child-size', str(size)]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return {"name": name, "size": size, "error": error[-1] if error else "échec"}
+    # Le résultat est la dernière ligne : certaines bibliothèques écrivent sur stdout
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Compare les débits à la référence ; retourne la liste des régressions."""
+    reference = {result_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        previous = reference.get(result_key(result))
+        if "error" in result or not previous or not previous.get("throughput"):
+            continue
+        ratio = result["throughput"] / previous["throughput"]
+        result["baseline_ratio"] = ratio
+        if ratio < 1 - tolerance:
+            regressions.append(result)
+    return regressions
+
+def format_bytes(value):
+    """Taille lisible (Mo)."""
+    return f"{value / (1024 * 1024):.1f} Mo"
+
+def print_results(results):
+    """Affiche les résultats sous forme de tableau."""
+    print(f"{'benchmark':34} {'débit':>18} {'temps':>9} {'pic RSS':>10} {'pic alloc':>10} {'blocs':>9} {'GC':>5} {'vs réf.':>8}")
+    print("-" * 112)
+    for result in results:
+        key = result_key(result)
+        if "error" in result:
+            print(f"{key:34} ⚠️  {result['error']}")
+            continue
+        ratio = f"{result['baseline_ratio']:.2f}x" if "baseline_ratio" in result else "-"
+        print(f"{key:34} {result['throughput']:>11.0f} {result['unit'] + '/s':<6} {result['seconds']:>8.3f}s"
+              f" {format_bytes(result['peak_rss_bytes']):>10} {format_bytes(result['alloc_peak_bytes']):>10}"
+              f" {result['alloc_blocks']:>9} {result['gc_collections']:>5} {ratio:>8}")
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline de données EPSF")
+    parser.add_argument('--only', action='append', default=[],
+                        help="ne lancer que les benchmarks dont le nom commence par ce préfixe (répétable)")
+    parser.add_argument('--sizes', default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="tailles des banques synthétiques (défaut : 10000,100000)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"répétitions par benchmark, meilleur temps retenu (défaut : {DEFAULT_REPEAT})")
+    parser.add_argument('--json', dest='json_output', help="écrire les résultats dans ce fichier JSON")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH),
+                        help="fichier de référence (défaut : benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="enregistrer les résultats comme nouvelle référence")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="baisse de débit tolérée avant de signaler une régression (défaut : 0.15)")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="code de sortie non nul en cas de régression")
+    parser.add_argument('--list', action='store_true', help="lister les benchmarks")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-size', type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    if args.child:
+        # Données de préparation dans un répertoire supprimé à la fin du processus
+        with tempfile.TemporaryDirectory() as tmp:
+            tempfile.tempdir = tmp
+            result = measure(args.child, args.child_size, args.repeat)
+        sys.stdout.write('\n' + json.dumps(result) + '\n')
+        return 0
+    
+    if args.list:
+        for name, (_, unit, synthetic) in BENCHMARKS.items():
+            print(f"{name:30} {unit}{' (synthétique)' if synthetic else ''}")
+        return 0
+    
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = []
+    for name, (_, _, synthetic) in BENCHMARKS.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        for size in (sizes if synthetic else [None]):
+            print(f"⏱️  {name}{f' [{size}]' if size else ''}...", file=sys.stderr)
+            results.append(run_isolated(name, size, args.repeat))
+    
+    baseline_path = Path(args.baseline)
+    regressions = []
+    missing_baseline = not args.save_baseline and not baseline_path.exists()
+    if not args.save_baseline and not missing_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    
+    print_results(results)
+    if missing_baseline:
+        print(f"\n⚠️  Pas de référence ({baseline_path}) : aucune comparaison effectuée."
+              f" La créer avec --save-baseline.")
+    
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Référence enregistrée : {baseline_path}")
+    
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} régression(s) de débit au-delà de {args.tolerance:.0%} :")
+        for result in regressions:
+            print(f"  - {result_key(result)} : {result['baseline_ratio']:.2f}x la référence")
+        if args.fail_on_regression:
+            return 1
+    if missing_baseline and args.fail_on_regression:
+        # Sans référence, l'absence de régression ne peut pas être garantie
+        return 1
+    
+    return 1 if any("error" in result for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Construction incrémentale de toute la chaîne de données
+
+Les étapes du pipeline forment un graphe de dépendances (DAG) :
+
+    public/epsf.pdf        --extract-->          src/data/questions.json (+ manifeste, images)
+    src/data/raw_data.txt  --parse:raw_data-->   src/data/banks/raw_data.json  --validate:raw_data
+    src/data/raw_data2.txt --parse:raw_data2-->  src/data/banks/raw_data2.json --validate:raw_data2
+    (les trois banques)    --merge-->            src/data/banks/merged.json    --validate:merged
+
+Toutes les sorties sont des fichiers produits : la banque revue à la main
+(src/data/questions_complete.json) n'est ni lue ni écrite par le build.
+
+Une étape dépend d'une autre si elle lit un fichier que l'autre produit ;
+chaque fichier raw_data*.txt de src/data/ ajoute ses étapes parse/validate.
+La clé d'une étape est un hash de son nom, de ses paramètres, du contenu de
+ses entrées et du code des scripts qu'elle utilise. Le cache persistant
+(.build-cache/) garde, pour chaque clé déjà construite, le hash des fichiers
+produits et une copie de leur contenu :
+
+- clé connue et sorties intactes : l'étape est à jour, elle est sautée ;
+- clé connue et sorties modifiées ou supprimées : elles sont restaurées
+  depuis le cache, sans exécuter l'étape ;
+- sinon l'étape est exécutée dans un pool de processus, en parallèle des
+  étapes indépendantes ; son journal est écrit dans .build-cache/logs/.
+
+Une étape dont les sorties ne changent pas (contenu identique) ne relance pas
+les étapes suivantes : après une modification de raw_data2.txt, seuls
+parse:raw_data2, validate:raw_data2, merge et validate:merged s'exécutent.
+
+    python build.py                     # tout construire
+    python build.py merge --jobs 2      # merge et ses dépendances
+    python build.py --list              # étapes et dépendances
+    python build.py --force             # tout réexécuter
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Version du format du cache et des clés : à incrémenter si le calcul des clés change
+BUILD_VERSION = 2
+
+DEFAULT_CACHE_DIR = Path(".build-cache")
+DATA_DIR = Path("src/data")
+BANKS_DIR = DATA_DIR / "banks"
+PUBLIC_DIR = Path("public")
+PDF_PATH = PUBLIC_DIR / "epsf.pdf"
+PDF_OUTPUT = DATA_DIR / "questions.json"
+# Manifeste de l'extraction incrémentale (extract_pdf_data.manifest_path_for)
+PDF_MANIFEST = DATA_DIR / "questions.manifest.json"
+MERGED_OUTPUT = BANKS_DIR / "merged.json"
+RAW_PATTERN = "raw_data*.txt"
+
+# Lignes de journal affichées quand une étape échoue
+LOG_TAIL = 15
+
+# Taille des blocs lus pour hacher un fichier
+HASH_CHUNK = 1 << 20
+
+# --- Actions (exécutées dans les processus du pool) ----------------------------
+
+def run_extract(pdf, output, public_dir):
+    """Extraction des questions du PDF (incrémentale, voir le manifeste de l'extracteur)."""
+    from extract_pdf_data import EPSFPDFExtractor
+    with EPSFPDFExtractor(pdf, public_dir) as extractor:
+        questions, reprocessed = extractor.extract_incremental(output)
+    print(f"{len(questions)} questions, {reprocessed} pages retraitées")
+
+def run_parse(source, output, title):
+    """Conversion d'une banque raw_data en fichier de quiz."""
+    from quiz_writer import write_quiz
+    from raw_data_parser import iter_file_questions, report_skipped
+    skipped = []
+    count = write_quiz(output, title, iter_file_questions(source, skipped=skipped))
+    report_skipped(skipped)
+    print(f"{count} questions écrites dans {output}")
+
+def run_merge(inputs, output):
+    """Fusion des banques de questions."""
+    from merge_questions import merge_questions
+    report = merge_questions(inputs, output)
+    if "error" in report:
+        raise RuntimeError(report["error"])
+
+def run_validate(path, public_dir):
+    """Validation d'un fichier de quiz (schéma, réponses, images)."""
+    from validate_quiz import main
+    if main([path, '--public-dir', public_dir]) != 0:
+        raise RuntimeError(f"{path} n'est pas valide")
+
+ACTIONS = {action.__name__: action for action in (run_extract, run_parse, run_merge, run_validate)}
+
+# --- Sorties connues après exécution (processus principal) ----------------------
+
+def extract_images(pdf, output, public_dir):
+    """Images de l'extraction référencées par la banque produite (les autres ne sont pas suivies)."""
+    from quiz_model import load_quiz
+    paths = set()
+    for question in load_quiz(output).questions:
+        for entry in [question] + question.options:
+            if entry.image:
+                paths.add(Path(public_dir) / entry.image.lstrip('/'))
+    return sorted(paths)
+
+OUTPUT_FINDERS = {finder.__name__: finder for finder in (extract_images,)}
+
+def _run_action(action, params, log_path):
+    """Exécute une action dans un processus du pool, sortie redirigée vers son journal.
+
+    Retourne None en cas de succès, le message d'erreur sinon.
+    """
+    with open(log_path, 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            ACTIONS[action](**params)
+        except Exception as e:  # l'erreur est rapportée au processus principal
+            import traceback
+            traceback.print_exc()
+            return f"{type(e).__name__}: {e}"
+    return None
+
+# --- Graphe des étapes ------------------------------------------------------
+
+class Stage:
+    """Étape du pipeline : action, fichiers lus et produits, code dont elle dépend.
+
+    ``find_outputs`` nomme une fonction de OUTPUT_FINDERS qui, appelée avec
+    les paramètres de l'étape après son exécution, donne les sorties dont les
+    noms ne sont pas connus d'avance (images nommées par hash de contenu).
+    """
+
+    def __init__(self, name, action, params, inputs, outputs, code, find_outputs=None):
+        self.name = name
+        self.action = action
+        self.params = params
+        self.inputs = [Path(path) for path in inputs]
+        self.outputs = [Path(path) for path in outputs]
+        self.code = code
+        self.find_outputs = find_outputs
+        self.deps = []
+
+    def produced(self):
+        """Toutes les sorties de l'étape, y compris celles trouvées après exécution."""
+        if self.find_outputs is None:
+            return list(self.outputs)
+        return self.outputs + OUTPUT_FINDERS[self.find_outputs](**self.params)
+
+def default_stages():
+    """Étapes de la chaîne : extraction, banques raw_data, fusion et validations."""
+    parse_code = ["raw_data_parser.py", "instrumentation.py", "quiz_model.py", "quiz_writer.py"]
+    validate_code = ["validate_quiz.py", "quiz_model.py"]
+    stages = [Stage("extract", "run_extract",
+                    {"pdf": str(PDF_PATH), "output": str(PDF_OUTPUT), "public_dir": str(PUBLIC_DIR)},
+                    [PDF_PATH], [PDF_OUTPUT, PDF_MANIFEST],
+                    ["extract_pdf_data.py", "instrumentation.py", "quiz_model.py", "quiz_writer.py"],
+                    find_outputs="extract_images")]
+    banks = [PDF_OUTPUT]
+
+    for source in sorted(DATA_DIR.glob(RAW_PATTERN)):
+        bank = BANKS_DIR / f"{source.stem}.json"
+        stages.append(Stage(f"parse:{source.stem}", "run_parse",
+                            {"source": str(source), "output": str(bank),
+                             "title": f"Quiz de Révision EPSF - {source.stem}"},
+                            [source], [bank], parse_code))
+        banks.append(bank)
+
+    stages.append(Stage("merge", "run_merge",
+                        {"inputs": [str(bank) for bank in banks], "output": str(MERGED_OUTPUT)},
+                        banks, [MERGED_OUTPUT], ["merge_questions.py", "near_duplicates.py", "search_index.py",
+                                                 "instrumentation.py", "quiz_model.py", "quiz_writer.py"]))
+
+    # La banque du PDF n'est validée qu'une fois fusionnée : ses ids sont les
+    # numéros de page, donc non continus
+    for path, name in [(bank, bank.stem) for bank in banks[1:]] + [(MERGED_OUTPUT, "merged")]:
+        stages.append(Stage(f"validate:{name}", "run_validate",
+                            {"path": str(path), "public_dir": str(PUBLIC_DIR)},
+                            [path], [], validate_code))
+    return stages
+
+def link_stages(stages):
+    """Relie chaque étape aux étapes qui produisent ses entrées ; vérifie l'absence de cycle."""
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} est produit par {producers[output].name} et {stage.name}")
+            producers[output] = stage
+    for stage in stages:
+        stage.deps = list({producers[path].name: producers[path]
+                           for path in stage.inputs if path in producers}.values())
+
+    # Parcours en profondeur : un cycle rendrait le graphe inconstructible
+    state = {}
+
+    def visit(stage, path):
+        if state.get(stage.name) == "done":
+            return
+        if state.get(stage.name) == "active":
+            raise ValueError("cycle de dépendances : " + " -> ".join(path + [stage.name]))
+        state[stage.name] = "active"
+        for dep in stage.deps:
+            visit(dep, path + [stage.name])
+        state[stage.name] = "done"
+
+    for stage in stages:
+        visit(stage, [])
+
+def select_stages(stages, targets):
+    """Étapes nécessaires aux cibles demandées (elles et leurs dépendances)."""
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [target for target in targets if target not in by_name]
+    if unknown:
+        raise ValueError(f"étapes inconnues : {', '.join(unknown)} (voir --list)")
+
+    selected = {}
+    pending = [by_name[target] for target in targets]
+    while pending:
+        stage = pending.pop()
+        if stage.name not in selected:
+            selected[stage.name] = stage
+            pending.extend(stage.deps)
+    return [stage for stage in stages if stage.name in selected]
+
+# --- Cache persistant ---------------------------------------------------------
+
+class BuildCache:
+    """Cache de construction : hash des fichiers, actions déjà exécutées, copies des sorties.
+
+    - hashes.json : chemin -> (taille, mtime_ns, sha256), pour ne pas relire
+      un fichier inchangé ;
+    - actions/<clé>.json : sorties (chemin -> sha256) produites pour une clé ;
+    - objects/<sha256> : contenu des sorties, pour les restaurer ;
+    - logs/<étape>.log : journal de la dernière exécution de chaque étape.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.actions_dir = self.cache_dir / "actions"
+        self.objects_dir = self.cache_dir / "objects"
+        self.logs_dir = self.cache_dir / "logs"
+        for directory in (self.actions_dir, self.objects_dir, self.logs_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self.hashes_path = self.cache_dir / "hashes.json"
+        try:
+            with open(self.hashes_path, 'r', encoding='utf-8') as f:
+                self.hashes = json.load(f)
+        except (OSError, ValueError):
+            self.hashes = {}
+
+    def file_hash(self, path):
+        """sha256 du contenu d'un fichier (None s'il n'existe pas), mémorisé par taille et date."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        known = self.hashes.get(str(path))
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                h.update(chunk)
+        self.hashes[str(path)] = [stat.st_size, stat.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def stage_key(self, stage, code_dir):
+        """Clé d'une étape : nom, action, paramètres, contenu des entrées et du code."""
+        description = {
+            "version": BUILD_VERSION,
+            "stage": stage.name,
+            "action": stage.action,
+            "params": stage.params,
+            "inputs": {str(path): self.file_hash(path) for path in stage.inputs},
+            "code": {name: self.file_hash(code_dir / name) for name in stage.code}
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """Sorties enregistrées pour une clé (chemin -> sha256), ou None."""
+        try:
+            with open(self.actions_dir / f"{key}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)["outputs"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def restore(self, outputs):
+        """Remet les sorties enregistrées en place ; retourne (à jour, restaurées) ou None si impossible."""
+        missing = [(path, digest) for path, digest in outputs.items() if self.file_hash(path) != digest]
+        if any(not (self.objects_dir / digest).exists() for _, digest in missing):
+            return None
+        for path, digest in missing:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            shutil.copyfile(self.objects_dir / digest, tmp_path)
+            os.replace(tmp_path, path)
+        return len(outputs) - len(missing), len(missing)
+
+    def record(self, key, stage, seconds):
+        """Enregistre les sorties d'une étape qui vient de s'exécuter."""
+        try:
+            produced = stage.produced()
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"{stage.name} : sorties illisibles ({e})") from None
+        outputs = {}
+        for path in produced:
+            digest = self.file_hash(path)
+            if digest is None:
+                raise RuntimeError(f"{stage.name} n'a pas produit {path}")
+            obj = self.objects_dir / digest
+            if not obj.exists():
+                tmp_path = obj.with_name(f"{digest}.tmp")
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, obj)
+            outputs[str(path)] = digest
+
+        with open(self.actions_dir / f"{key}.json", 'w', encoding='utf-8') as f:
+            json.dump({"stage": stage.name, "outputs": outputs, "seconds": round(seconds, 3),
+                       "created": datetime.now(timezone.utc).isoformat(timespec='seconds')}, f, indent=2)
+
+    def save(self):
+        """Écrit la table des hash (atomique)."""
+        tmp_path = self.hashes_path.with_name(self.hashes_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.hashes, f, separators=(',', ':'))
+        os.replace(tmp_path, self.hashes_path)
+
+# --- Ordonnancement ------------------------------------------------------------
+
+def build(stages, cache, jobs=None, force=False):
+    """Construit les étapes, en parallèle dès que leurs dépendances sont prêtes.
+
+    Retourne le résumé : étape -> 'à jour', 'restaurée', 'exécutée', 'échec'
+    ou 'non construite' (dépendance en échec).
+    """
+    code_dir = Path(__file__).resolve().parent
+    status = {}
+    waiting = list(stages)
+    running = {}
+
+    def ready(stage):
+        return all(status.get(dep.name) in ("à jour", "restaurée", "exécutée") for dep in stage.deps)
+
+    def blocked(stage):
+        return any(status.get(dep.name) in ("échec", "non construite") for dep in stage.deps)
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        while waiting or running:
+            for stage in list(waiting):
+                if blocked(stage):
+                    waiting.remove(stage)
+                    status[stage.name] = "non construite"
+                    print(f"⏹️  {stage.name} : dépendance en échec")
+                    continue
+                if not ready(stage):
+                    continue
+                waiting.remove(stage)
+
+                absent = [str(path) for path in stage.inputs if cache.file_hash(path) is None]
+                if absent:
+                    status[stage.name] = "échec"
+                    print(f"❌ {stage.name} : entrée manquante ({', '.join(absent)})")
+                    continue
+
+                key = cache.stage_key(stage, code_dir)
+                outputs = None if force else cache.lookup(key)
+                restored = cache.restore(outputs) if outputs is not None else None
+                if restored is not None:
+                    status[stage.name] = "restaurée" if restored[1] else "à jour"
+                    print(f"{'♻️ ' if restored[1] else '✔️ '} {stage.name} : {status[stage.name]}")
+                    continue
+
+                print(f"▶️  {stage.name}")
+                log_path = cache.logs_dir / f"{stage.name.replace(':', '-')}.log"
+                future = pool.submit(_run_action, stage.action, stage.params, str(log_path))
+                running[future] = (stage, key, log_path, time.perf_counter())
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key, log_path, start = running.pop(future)
+                seconds = time.perf_counter() - start
+                error = future.result()
+                if error is None:
+                    try:
+                        cache.record(key, stage, seconds)
+                    except RuntimeError as e:
+                        error = str(e)
+                if error is None:
+                    status[stage.name] = "exécutée"
+                    print(f"✅ {stage.name} ({seconds:.1f} s)")
+                    continue
+
+                status[stage.name] = "échec"
+                print(f"❌ {stage.name} : {error} (journal : {log_path})")
+                with open(log_path, 'r', encoding='utf-8') as f:
+                    for line in f.read().splitlines()[-LOG_TAIL:]:
+                        print(f"   {line}")
+
+    cache.save()
+    return status
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Construction incrémentale des données EPSF")
+    parser.add_argument('targets', nargs='*',
+                        help="étapes à construire, avec leurs dépendances (défaut : toutes)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="étapes exécutées en parallèle (défaut : nombre de cœurs)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignorer le cache et réexécuter toutes les étapes demandées")
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR),
+                        help=f"répertoire du cache (défaut : {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--list', action='store_true',
+                        help="afficher les étapes, leurs entrées, sorties et dépendances")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Fonction principale ; retourne le code de sortie."""
+    args = parse_args(argv)
+    stages = default_stages()
+    try:
+        link_stages(stages)
+        stages = select_stages(stages, args.targets) if args.targets else stages
+    except ValueError as e:
+        print(f"Erreur : {e}")
+        return 2
+
+    if args.list:
+        for stage in stages:
+            deps = ", ".join(dep.name for dep in stage.deps) or "-"
+            print(f"{stage.name:<20} {' '.join(map(str, stage.inputs))} -> "
+                  f"{' '.join(map(str, stage.outputs)) or '(contrôle)'}   [après : {deps}]")
+        return 0
+
+    start = time.perf_counter()
+    status = build(stages, BuildCache(args.cache_dir), args.jobs, args.force)
+
+    counts = {}
+    for value in status.values():
+        counts[value] = counts.get(value, 0) + 1
+    summary = ", ".join(f"{count} {value}" for value, count in counts.items())
+    print(f"\n{len(status)} étapes en {time.perf_counter() - start:.1f} s : {summary}")
+    return 0 if all(value in ("à jour", "restaurée", "exécutée") for value in status.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export de la banque de questions en paquets statiques pour l'application
+
+La banque fusionnée (src/data/questions_complete.json) est découpée en
+paquets de taille fixe regroupés par famille de code (RSP, AEMC, ...).
+Chaque paquet est un JSON minifié dont le nom contient un hash de son
+contenu : il peut être mis en cache indéfiniment. Un manifeste compact
+(manifest.json, seul fichier non haché) décrit les familles et les paquets ;
+le premier affichage n'a besoin que du manifeste et du premier paquet.
+L'index de recherche plein texte (search_index.py) est écrit à côté, lui
+aussi sous un nom haché.
+
+Structure produite (par défaut dans public/quiz/) :
+
+    manifest.json
+    rsp-0-3f2a9c0d1b7e.json
+    rsp-1-8c41d2e07fa9.json
+    aemc-0-...
+    search-5be0c14a92d3.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from quiz_model import load_quiz
+from search_index import SearchIndex
+
+DEFAULT_INPUT = Path("src/data/questions_complete.json")
+DEFAULT_OUTPUT_DIR = Path("public/quiz")
+DEFAULT_SHARD_SIZE = 50
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+FAMILY_PATTERN = re.compile(r'^\s*([A-Za-z]+)')
+DEFAULT_FAMILY = "AUTRE"
+SHARD_NAME_PATTERN = re.compile(r'^[a-z]+-\d+-[0-9a-f]{12}\.json$')
+SEARCH_NAME_PATTERN = re.compile(r'^search-[0-9a-f]{12}\.json$')
+
+def code_family(code):
+    """Famille d'un code de question ("RSP 15" -> "RSP", "AEMC 27bis" -> "AEMC")."""
+    match = FAMILY_PATTERN.match(code or '')
+    return match.group(1).upper() if match else DEFAULT_FAMILY
+
+def dumps_compact(data):
+    """JSON minifié (sans espaces), en UTF-8."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_atomic(path, content):
+    """Écrit un fichier via un fichier temporaire renommé."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def group_by_family(questions):
+    """Regroupe les questions par famille, dans l'ordre de première apparition."""
+    families = {}
+    for question in questions:
+        families.setdefault(code_family(question.code), []).append(question)
+    return families
+
+def export_bundles(input_file=DEFAULT_INPUT, output_dir=DEFAULT_OUTPUT_DIR, shard_size=DEFAULT_SHARD_SIZE):
+    """Découpe la banque en paquets et écrit le manifeste ; retourne le manifeste."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    quiz = load_quiz(input_file)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "title": quiz.title,
+        "description": quiz.description,
+        "total": len(quiz.questions),
+        "shardSize": shard_size,
+        "families": [],
+        "shards": [],
+        "search": None
+    }
+
+    written = 0
+    for family, questions in group_by_family(quiz.questions).items():
+        shard_indexes = []
+        for index, start in enumerate(range(0, len(questions), shard_size)):
+            chunk = questions[start:start + shard_size]
+            content = dumps_compact({"family": family, "questions": [question.to_dict() for question in chunk]})
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            filename = f"{family.lower()}-{index}-{digest}.json"
+
+            # Même nom = même contenu : un paquet existant est déjà à jour
+            shard_path = output_dir / filename
+            if not shard_path.exists():
+                write_atomic(shard_path, content)
+                written += 1
+
+            shard_indexes.append(len(manifest["shards"]))
+            manifest["shards"].append({
+                "file": filename,
+                "family": family,
+                "count": len(chunk),
+                "bytes": len(content),
+                "ids": [question.id for question in chunk]
+            })
+
+        manifest["families"].append({
+            "name": family,
+            "count": len(questions),
+            "shards": shard_indexes
+        })
+
+    # Index de recherche de toute la banque, dans l'ordre des questions
+    index = SearchIndex.build(quiz.questions)
+    content = index.dumps()
+    filename = f"search-{hashlib.sha256(content).hexdigest()[:12]}.json"
+    if not (output_dir / filename).exists():
+        write_atomic(output_dir / filename, content)
+        written += 1
+    manifest["search"] = {"file": filename, "bytes": len(content), "terms": len(index.postings)}
+
+    write_atomic(output_dir / MANIFEST_NAME, dumps_compact(manifest))
+
+    # Supprimer les paquets et index d'exports précédents qui ne sont plus référencés
+    current = {shard["file"] for shard in manifest["shards"]} | {filename}
+    removed = 0
+    for path in output_dir.iterdir():
+        if (SHARD_NAME_PATTERN.match(path.name) or SEARCH_NAME_PATTERN.match(path.name)) and path.name not in current:
+            path.unlink()
+            removed += 1
+
+    print(f"✅ {manifest['total']} questions exportées en {len(manifest['shards'])} paquets "
+          f"({len(manifest['families'])} familles) dans {output_dir}")
+    print(f"   {written} fichiers écrits, {len(manifest['shards']) + 1 - written} déjà à jour, {removed} obsolètes supprimés")
+    print(f"🔎 Index de recherche : {filename} ({manifest['search']['terms']} termes, {len(content)} octets)")
+    return manifest
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Export de la banque de questions en paquets statiques")
+    parser.add_argument('input', nargs='?', default=str(DEFAULT_INPUT),
+                        help=f"banque de questions à exporter (défaut : {DEFAULT_INPUT})")
+    parser.add_argument('--output-dir', '-o', default=str(DEFAULT_OUTPUT_DIR),
+                        help=f"répertoire de sortie (défaut : {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f"nombre maximal de questions par paquet (défaut : {DEFAULT_SHARD_SIZE})")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    export_bundles(args.input, args.output_dir, args.shard_size)
@@ -4,30 +4,209 @@ Script pour extraire les questions, réponses et images du PDF EPSF
 et générer un fichier JSON compatible avec l'application de quiz.
 """
 
+import argparse
+import copy
+import hashlib
 import json
 import os
 import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
 import fitz  # PyMuPDF
 from PIL import Image
 import io
 
+import instrumentation
+from quiz_model import QuizOption, QuizQuestion
+from quiz_writer import write_quiz
+
+try:
+    import numpy as np
+except ImportError:  # NumPy n'est requis que pour l'analyse raster des couleurs
+    np = None
+
+# Version du format du manifeste et de la logique d'extraction : à incrémenter
+# dès que le parsing change, pour forcer le retraitement de toutes les pages
+MANIFEST_VERSION = 5
+
+# Motifs compilés une seule fois pour toutes les pages
+# - numéro d'option en début de ligne (« 1. », « 2. »...)
+# - numéro seul sous une option graphique
+# - code de la question (« RSP 15 », « AEMC 27bis »), en bas de page
+OPTION_MARKER_PATTERN = re.compile(r'^(\d+)\.(?:\s|$)')
+OPTION_LABEL_PATTERN = re.compile(r'^\d{1,2}$')
+CODE_PATTERN = re.compile(r'^([A-Z]{2,})\s*(\d+)\s*(bis|ter)?$')
+CODE_SEARCH_PATTERN = re.compile(r'([A-Z]+)\s*(\d+)')
+TEXT_OPTION_PATTERN = re.compile(r'^(\d+)\.\s*(.+)$')
+MULTIPLE_PATTERN = re.compile(r'plusieurs réponses', re.IGNORECASE)
+
+# Fraction de la hauteur de page au-delà de laquelle se trouve le code
+CODE_ZONE_RATIO = 0.9
+
+# Résolution du rendu utilisé quand la couleur du texte ne suffit pas,
+# et nombre minimal de pixels verts pour marquer une option
+GREEN_SCAN_DPI = 24
+GREEN_SCAN_MIN_PIXELS = 3
+
+# Nombre de pages gardées en cache par l'API page à page (question, page_images)
+PAGE_CACHE_SIZE = 128
+
+# Illustrations vectorielles (signaux, schémas, flèches) : résolution du rendu
+# des zones découpées, écart en points en dessous duquel deux tracés forment
+# une même illustration, marge autour du rendu et taille minimale d'une zone
+VECTOR_DPI = 150
+VECTOR_GAP = 6
+VECTOR_MARGIN = 2
+VECTOR_MIN_SIZE = 12
+# Fraction de la surface de la page au-delà de laquelle un tracé est un fond
+BACKGROUND_RATIO = 0.8
+# Cache des rendus vectoriels (un fichier par empreinte de page) : hors de
+# public/, dont tout le contenu est servi par Next.js
+VECTOR_CACHE_DIR = ".build-cache/vectors"
+
+def _is_label_row(row: Dict[str, Any]) -> bool:
+    """Indiquer si une rangée ne contient que les numéros 1, 2, ..., n."""
+    texts = [line["text"] for line in row["lines"]]
+    if len(texts) < 2 or not all(OPTION_LABEL_PATTERN.match(text) for text in texts):
+        return False
+    return sorted(int(text) for text in texts) == list(range(1, len(texts) + 1))
+
+def _is_green(color: int) -> bool:
+    """Indiquer si une couleur sRGB (entier 0xRRGGBB) est un vert franc."""
+    red, green, blue = (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+    return green >= 0x80 and green - red >= 0x40 and green - blue >= 0x30
+
+def _color_to_int(color: Sequence[float]) -> int:
+    """Convertir une couleur de tracé (gris, RVB ou CMJN, composantes 0-1) en entier 0xRRGGBB."""
+    if len(color) == 1:
+        color = tuple(color) * 3
+    elif len(color) == 4:
+        cyan, magenta, yellow, black = color
+        color = ((1 - cyan) * (1 - black), (1 - magenta) * (1 - black), (1 - yellow) * (1 - black))
+    red, green, blue = (round(component * 255) for component in color)
+    return (red << 16) | (green << 8) | blue
+
+def _near(rect: fitz.Rect, other: fitz.Rect, gap: float) -> bool:
+    """Indiquer si deux rectangles (éventuellement plats, comme un trait) sont à moins de ``gap`` points."""
+    return (rect.x0 - gap <= other.x1 and other.x0 <= rect.x1 + gap
+            and rect.y0 - gap <= other.y1 and other.y0 <= rect.y1 + gap)
+
+def _cluster_rects(rects: Sequence[fitz.Rect], gap: float) -> List[Tuple[fitz.Rect, List[int]]]:
+    """Regrouper des rectangles proches en grappes : (rectangle englobant, index des membres)."""
+    clusters: List[Tuple[fitz.Rect, List[int]]] = []
+    for index, rect in enumerate(rects):
+        bbox, members = fitz.Rect(rect), [index]
+        merged = True
+        while merged:
+            merged = False
+            for cluster in clusters:
+                if _near(cluster[0], bbox, gap):
+                    other = cluster[0]
+                    bbox = fitz.Rect(min(bbox.x0, other.x0), min(bbox.y0, other.y0),
+                                     max(bbox.x1, other.x1), max(bbox.y1, other.y1))
+                    members.extend(cluster[1])
+                    clusters.remove(cluster)
+                    merged = True
+                    break
+        clusters.append((bbox, members))
+    return clusters
+
 class EPSFPDFExtractor:
-    def __init__(self, pdf_path: str, output_dir: str = "public"):
+    def __init__(self, pdf_path: str, output_dir: str = "public", cache_size: int = PAGE_CACHE_SIZE,
+                 vector_dpi: int = VECTOR_DPI, vector_cache_dir: str = VECTOR_CACHE_DIR):
         self.pdf_path = pdf_path
         self.output_dir = Path(output_dir)
         self.images_dir = self.output_dir / "images"
         self.images_dir.mkdir(parents=True, exist_ok=True)
+        self.vector_cache_dir = Path(vector_cache_dir)
+        self.vector_dpi = vector_dpi
         
         # Ouvrir le PDF
         self.doc = fitz.open(pdf_path)
         
+        # Caches d'images à l'échelle du document : xref -> image et
+        # hash du contenu -> image (None si l'image n'est pas exportable)
+        self._xref_cache: Dict[int, Optional[Dict[str, str]]] = {}
+        self._hash_cache: Dict[str, Optional[Dict[str, str]]] = {}
+        
+        # Caches LRU bornés de l'API page à page : page -> question parsée
+        # (None si la page n'en contient pas) et page -> images de la page
+        self.cache_size = cache_size
+        self._question_cache: OrderedDict[int, Optional[Dict[str, Any]]] = OrderedDict()
+        self._images_cache: OrderedDict[int, List[Dict[str, Any]]] = OrderedDict()
+        
+        # Empreintes déjà calculées : page -> empreinte
+        self._fingerprints: Dict[int, str] = {}
+    
+    def __enter__(self) -> "EPSFPDFExtractor":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __len__(self) -> int:
+        """Nombre de pages du document."""
+        return len(self.doc)
+        
     def extract_text_from_page(self, page_num: int) -> str:
         """Extraire le texte d'une page."""
         page = self.doc[page_num]
         return page.get_text()
     
+    def _write_image(self, filename: str, data: bytes):
+        """Écrire un PNG dans le répertoire des images (atomique, une seule fois)."""
+        img_path = self.images_dir / filename
+        if img_path.exists():
+            return
+        with instrumentation.stage("pdf.image_write"):
+            tmp_path = img_path.with_name(f"{filename}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, img_path)
+        instrumentation.count("pdf.images_written")
+        instrumentation.count("pdf.bytes_written", len(data))
+    
+    def _load_image(self, xref: int) -> Optional[Dict[str, str]]:
+        """Décoder, encoder et sauvegarder une fois l'image d'un xref.
+        
+        Le nom de fichier est dérivé d'un hash du flux brut de l'image :
+        deux xrefs au contenu identique partagent le même fichier. Les
+        images CMJN sont converties en RVB avant l'encodage PNG.
+        """
+        digest = hashlib.sha1(self.doc.xref_stream_raw(xref) or b"").hexdigest()[:16]
+        
+        if digest in self._hash_cache:
+            instrumentation.count("pdf.image_hash_hits")
+            return self._hash_cache[digest]
+        
+        img_filename = f"img_{digest}.png"
+        entry = None
+        try:
+            # Sauvegarder l'image (une seule fois, même entre plusieurs exécutions)
+            if not (self.images_dir / img_filename).exists():
+                with instrumentation.stage("pdf.pixmap"):
+                    pix = fitz.Pixmap(self.doc, xref)
+                instrumentation.count("pdf.images_decoded")
+                if pix.n - pix.alpha >= 4:  # CMJN : PNG n'accepte que GRAY et RGB
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+                    instrumentation.count("pdf.images_converted")
+                with instrumentation.stage("pdf.png_encode"):
+                    data = pix.tobytes("png")
+                pix = None  # Libérer la mémoire
+                self._write_image(img_filename, data)
+            entry = {
+                "filename": img_filename,
+                "path": f"/images/{img_filename}"
+            }
+        except (RuntimeError, ValueError) as e:  # format non supporté par MuPDF
+            print(f"Image {xref} ignorée : {e}")
+        
+        self._hash_cache[digest] = entry
+        return entry
+    
     def extract_images_from_page(self, page_num: int) -> List[Dict[str, Any]]:
         """Extraire les images d'une page."""
         page = self.doc[page_num]
@@ -37,36 +216,164 @@ class EPSFPDFExtractor:
         image_list = page.get_images()
         
         for img_index, img in enumerate(image_list):
-            # Extraire l'image
+            # Un même xref (logo, pictogramme...) n'est traité qu'une fois par document
             xref = img[0]
-            pix = fitz.Pixmap(self.doc, xref)
+            if xref not in self._xref_cache:
+                self._xref_cache[xref] = self._load_image(xref)
+            else:
+                instrumentation.count("pdf.image_xref_hits")
+            entry = self._xref_cache[xref]
             
-            # Convertir en PIL Image si nécessaire
-            if pix.n - pix.alpha < 4:  # GRAY ou RGB
-                img_data = pix.tobytes("png")
-                img_filename = f"question_{page_num + 1}_img_{img_index + 1}.png"
-                img_path = self.images_dir / img_filename
-                
-                # Sauvegarder l'image
-                with open(img_path, "wb") as f:
-                    f.write(img_data)
-                
-                # Obtenir les coordonnées de l'image sur la page
-                img_rect = page.get_image_rects(img)[0] if page.get_image_rects(img) else None
-                
-                images.append({
-                    "filename": img_filename,
-                    "path": f"/images/{img_filename}",
-                    "rect": img_rect,
-                    "index": img_index
-                })
+            if entry is None:  # format non supporté
+                continue
             
-            pix = None  # Libérer la mémoire
+            # Obtenir les coordonnées de l'image sur la page
+            img_rects = page.get_image_rects(img)
             
+            images.append({
+                "filename": entry["filename"],
+                "path": entry["path"],
+                "rect": img_rects[0] if img_rects else None,
+                "index": img_index
+            })
+        
+        instrumentation.count("pdf.images", len(images))
         return images
     
-    def parse_question_text(self, text: str, page_num: int) -> Optional[Dict[str, Any]]:
-        """Parser le texte d'une page pour extraire la question et les réponses."""
+    def _illustration_rects(self, page: fitz.Page, labels: Sequence[fitz.Rect]) -> List[fitz.Rect]:
+        """Rectangles des tracés vectoriels qui dessinent des illustrations.
+        
+        Sont écartés le fond de page (tracé couvrant presque toute la page),
+        les cadres blancs sans contour, les marques vertes des réponses et les
+        cercles qui entourent les numéros des options graphiques.
+        """
+        with instrumentation.stage("pdf.get_drawings"):
+            drawings = page.get_drawings()
+        page_area = page.rect.get_area()
+        rects = []
+        
+        for drawing in drawings:
+            rect, fill = drawing["rect"], drawing.get("fill")
+            if rect.get_area() >= page_area * BACKGROUND_RATIO:
+                continue
+            if fill is not None:
+                color = _color_to_int(fill)
+                if _is_green(color) or (color == 0xFFFFFF and drawing.get("color") is None):
+                    continue
+            elif any(rect.contains(label) for label in labels):
+                continue
+            rects.append(rect)
+        
+        return rects
+    
+    def _load_vector_cache(self, fingerprint: str) -> Optional[List[Dict[str, Any]]]:
+        """Rendus vectoriels d'une page déjà calculés, ou None."""
+        try:
+            with open(self.vector_cache_dir / f"{fingerprint}.json", 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if cached.get("version") != MANIFEST_VERSION or cached.get("dpi") != self.vector_dpi:
+            return None
+        # Une image supprimée depuis invalide l'entrée
+        if not all((self.images_dir / entry["filename"]).exists() for entry in cached["images"]):
+            return None
+        return cached["images"]
+    
+    def _save_vector_cache(self, fingerprint: str, entries: List[Dict[str, Any]]):
+        """Enregistrer les rendus vectoriels d'une page (écriture atomique)."""
+        self.vector_cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path = self.vector_cache_dir / f"{fingerprint}.json"
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "dpi": self.vector_dpi, "images": entries},
+                      f, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    
+    def _render_vector_images(self, page: fitz.Page, images: List[Dict[str, Any]],
+                              labels: Sequence[fitz.Rect]) -> List[Dict[str, Any]]:
+        """Détecter et rendre les illustrations vectorielles d'une page.
+        
+        Les tracés proches (et les images raster qu'ils touchent, comme une
+        photo annotée d'une flèche) sont regroupés en grappes ; seul le
+        rectangle de chaque grappe est rendu, jamais la page entière. Chaque
+        entrée indique les images raster qu'elle recouvre (``covers``).
+        """
+        drawings = self._illustration_rects(page, labels)
+        if not drawings:
+            return []
+        
+        rasters = [img for img in images if img["rect"] is not None]
+        rects = drawings + [img["rect"] for img in rasters]
+        page_area = page.rect.get_area()
+        zoom = self.vector_dpi / 72
+        entries = []
+        
+        for bbox, members in _cluster_rects(rects, VECTOR_GAP):
+            # Grappe d'images raster seules : déjà extraites telles quelles
+            if not any(member < len(drawings) for member in members):
+                continue
+            if min(bbox.width, bbox.height) < VECTOR_MIN_SIZE or bbox.get_area() >= page_area * BACKGROUND_RATIO:
+                continue
+            
+            clip = fitz.Rect(bbox.x0 - VECTOR_MARGIN, bbox.y0 - VECTOR_MARGIN,
+                             bbox.x1 + VECTOR_MARGIN, bbox.y1 + VECTOR_MARGIN) & page.rect
+            with instrumentation.stage("pdf.vector_render"):
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, colorspace=fitz.csRGB, alpha=False)
+            with instrumentation.stage("pdf.png_encode"):
+                data = pix.tobytes("png")
+            pix = None
+            
+            img_filename = f"vec_{hashlib.sha1(data).hexdigest()[:16]}.png"
+            self._write_image(img_filename, data)
+            entries.append({
+                "filename": img_filename,
+                "rect": [clip.x0, clip.y0, clip.x1, clip.y1],
+                "covers": sorted(rasters[member - len(drawings)]["index"]
+                                 for member in members if member >= len(drawings))
+            })
+        
+        return entries
+    
+    def vector_images(self, page_num: int, images: List[Dict[str, Any]],
+                      labels: Sequence[fitz.Rect] = ()) -> List[Dict[str, Any]]:
+        """Images de la page complétées par ses illustrations vectorielles.
+        
+        Les rendus sont mis en cache par empreinte de page : une page
+        inchangée n'est ni analysée ni rendue à nouveau. Les images raster
+        recouvertes par un rendu (photo annotée) sont remplacées par celui-ci.
+        """
+        fingerprint = self.page_fingerprint(page_num)
+        entries = self._load_vector_cache(fingerprint)
+        if entries is None:
+            instrumentation.count("pdf.vector_cache_misses")
+            entries = self._render_vector_images(self.doc[page_num], images, labels)
+            self._save_vector_cache(fingerprint, entries)
+        else:
+            instrumentation.count("pdf.vector_cache_hits")
+        
+        if not entries:
+            return images
+        
+        covered = {index for entry in entries for index in entry["covers"]}
+        result = [img for img in images if img["index"] not in covered]
+        for offset, entry in enumerate(entries):
+            result.append({
+                "filename": entry["filename"],
+                "path": f"/images/{entry['filename']}",
+                "rect": fitz.Rect(entry["rect"]),
+                "index": len(images) + offset
+            })
+        instrumentation.count("pdf.vector_images", len(entries))
+        return result
+    
+    def parse_question_text(self, text: str, page_num: int) -> Optional[QuizQuestion]:
+        """Parser le texte brut d'une page pour extraire la question et les réponses.
+        
+        Analyse ligne à ligne sans géométrie, conservée pour les textes déjà
+        extraits ; ``process_page`` utilise ``parse_page_layout``.
+        """
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
         if not lines:
@@ -76,129 +383,516 @@ class EPSFPDFExtractor:
         question_text = lines[0]
         
         # Chercher le code de la question (en bas à droite)
-        code_pattern = r'([A-Z]+)\s*(\d+)'
         code_match = None
         for line in reversed(lines):
-            match = re.search(code_pattern, line)
+            match = CODE_SEARCH_PATTERN.search(line)
             if match:
                 code_match = match
                 break
         
         # Déterminer si c'est une question à choix multiple
-        is_multiple = any("plusieurs réponses" in line.lower() for line in lines)
+        is_multiple = any(MULTIPLE_PATTERN.search(line) for line in lines)
         
         # Extraire les options de réponse (numérotées 1., 2., 3., etc.)
         options = []
-        option_pattern = r'^(\d+)\.\s*(.+)$'
         
         for line in lines[1:]:  # Ignorer la première ligne (question)
-            match = re.match(option_pattern, line)
+            match = TEXT_OPTION_PATTERN.match(line)
             if match:
                 option_id = match.group(1)
                 option_text = match.group(2).strip()
-                options.append({
-                    "id": option_id,
-                    "text": option_text
-                })
+                options.append(QuizOption(option_id, option_text))
         
         # Pour l'instant, on ne peut pas détecter automatiquement les bonnes réponses
         # depuis le texte seul (il faudrait analyser les couleurs)
         # On va créer une structure de base
         
-        question_data = {
-            "id": page_num + 1,
-            "question": question_text,
-            "type": "multiple" if is_multiple else "single",
-            "options": options,
-            "correctAnswers": [],  # À remplir manuellement ou avec analyse des couleurs
-            "code": f"{code_match.group(1)}{code_match.group(2)}" if code_match else f"Q{page_num + 1}"
-        }
+        return QuizQuestion(
+            page_num + 1,
+            question_text,
+            "multiple" if is_multiple else "single",
+            options,
+            [],  # À remplir manuellement ou avec analyse des couleurs
+            f"{code_match.group(1)}{code_match.group(2)}" if code_match else f"Q{page_num + 1}"
+        )
+    
+    def _layout_rows(self, text_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Regrouper les lignes de texte en rangées visuelles, de haut en bas.
+        
+        Les lignes dont les centres verticaux sont alignés (« 1. » et le texte
+        de l'option dans deux blocs distincts, par exemple) forment une seule
+        rangée, lue de gauche à droite.
+        """
+        lines = []
+        for block in text_dict["blocks"]:
+            if block["type"] != 0:
+                continue
+            for line in block["lines"]:
+                text = "".join(span["text"] for span in line["spans"]).strip()
+                if not text:
+                    continue
+                # Les chiffres seuls en vert sont des rangs (« Ordonner les réponses »)
+                green = any(_is_green(span["color"]) for span in line["spans"]
+                            if span["text"].strip() and not span["text"].strip().isdigit())
+                lines.append({"rect": fitz.Rect(line["bbox"]), "text": text, "green": green})
         
-        return question_data
+        lines.sort(key=lambda line: (line["rect"].y0 + line["rect"].y1) / 2)
+        
+        rows = []
+        for line in lines:
+            rect = line["rect"]
+            center = (rect.y0 + rect.y1) / 2
+            if rows and abs(center - rows[-1]["center"]) <= min(rect.height, rows[-1]["height"]) / 2:
+                rows[-1]["lines"].append(line)
+            else:
+                rows.append({"center": center, "height": rect.height, "lines": [line]})
+        
+        for row in rows:
+            row["lines"].sort(key=lambda line: line["rect"].x0)
+            row["rect"] = fitz.Rect(row["lines"][0]["rect"])
+            for line in row["lines"][1:]:
+                row["rect"] |= line["rect"]
+            row["text"] = " ".join(line["text"] for line in row["lines"])
+            row["green"] = any(line["green"] for line in row["lines"])
+        
+        return rows
     
-    def analyze_page_colors(self, page_num: int) -> Dict[str, Any]:
-        """Analyser les couleurs d'une page pour détecter les réponses correctes (en vert)."""
+    def parse_page_layout(self, page_num: int, images: Optional[List[Dict[str, Any]]] = None) -> Optional[QuizQuestion]:
+        """Parser une page en une passe à partir de la géométrie du texte.
+        
+        Le texte de la page est lu une seule fois (``get_text("dict")``) ;
+        question, options, code, réponses en vert et association des images
+        (raster et illustrations vectorielles, voir ``vector_images``)
+        sont déterminés à partir de la position des rangées de texte. Retourne
+        None pour les pages sans option (titres, intercalaires) et pour celles
+        sans code ni réponse correcte (page d'exemple de présentation).
+        """
         page = self.doc[page_num]
+        with instrumentation.stage("pdf.get_text"):
+            text_dict = page.get_text("dict")
+        code_zone = page.rect.y1 * CODE_ZONE_RATIO
+        
+        question_parts = []
+        options = []
+        code = None
+        is_multiple = False
+        current = None
+        
+        for row in self._layout_rows(text_dict):
+            text, rect = row["text"], row["rect"]
+            
+            # Code de la question, en bas de la page
+            code_match = CODE_PATTERN.match(text) if rect.y0 >= code_zone else None
+            if code_match:
+                code = "".join(group for group in code_match.groups() if group)
+                continue
+            
+            if MULTIPLE_PATTERN.search(text):
+                is_multiple = True
+                continue
+            
+            option_match = OPTION_MARKER_PATTERN.match(text)
+            if option_match:
+                current = {"id": option_match.group(1), "text": text[option_match.end():].strip(),
+                           "rect": fitz.Rect(rect), "green": row["green"], "label": False}
+                options.append(current)
+            elif _is_label_row(row):
+                # Options graphiques : rangée de numéros seuls (1, 2, 3...) sous les illustrations
+                for line in row["lines"]:
+                    options.append({"id": line["text"], "text": "", "rect": fitz.Rect(line["rect"]),
+                                    "green": line["green"], "label": True})
+                current = None
+            elif current and rect.x0 >= current["rect"].x0 - 1 and rect.y0 - current["rect"].y1 < row["height"] / 2:
+                # Suite de l'option sur la ligne suivante
+                current["text"] = f"{current['text']} {text}".strip()
+                current["rect"] |= rect
+                current["green"] = current["green"] or row["green"]
+            elif not options:
+                question_parts.append(text)
+            else:
+                current = None
         
-        # Cette fonction nécessiterait une analyse plus complexe des couleurs
-        # Pour l'instant, on retourne une structure vide
-        return {"green_elements": []}
+        if not options:
+            return None
+        
+        options.sort(key=lambda option: int(option["id"]))
+        
+        # Réponses correctes : texte vert, sinon analyse raster de la page
+        correct_answers = [option["id"] for option in options if option["green"]]
+        if not correct_answers:
+            green_elements = self._scan_green_regions(page, self._answer_regions(options, page.rect, code_zone))
+            marked = {element["option"] for element in green_elements}
+            correct_answers = [option["id"] for option in options if option["id"] in marked]
+        
+        # Page d'exemple (« La question est notée ICI ») : des options, mais ni code ni réponse
+        if not code and not correct_answers:
+            return None
+        
+        question_data = QuizQuestion(
+            page_num + 1,
+            " ".join(question_parts),
+            "multiple" if is_multiple or len(correct_answers) > 1 else "single",
+            [QuizOption(option["id"], option["text"]) for option in options],
+            correct_answers,
+            code or f"Q{page_num + 1}"
+        )
+        
+        labels = [option["rect"] for option in options if option["label"]]
+        with instrumentation.stage("pdf.vectors"):
+            images = self.vector_images(page_num, images or [], labels)
+        self._attach_images(question_data, options, images)
+        return question_data
     
-    def extract_all_questions(self) -> List[Dict[str, Any]]:
-        """Extraire toutes les questions du PDF."""
-        questions = []
+    def _answer_regions(self, options: List[Dict[str, Any]], page_rect: fitz.Rect,
+                        bottom: float) -> List[Tuple[str, fitz.Rect]]:
+        """Zones où chercher la marque verte de chaque option.
+        
+        Option texte : sa bande, depuis le bord gauche de la page (étoile
+        devant le numéro). Option graphique : la colonne sous son numéro,
+        bornée à mi-distance des numéros voisins.
+        """
+        regions = []
+        labels = [option for option in options if option["label"]]
+        
+        for option in options:
+            rect = option["rect"]
+            if not option["label"]:
+                regions.append((option["id"], fitz.Rect(0, rect.y0, rect.x1, rect.y1)))
+                continue
+            
+            index = labels.index(option)
+            centers = [(label["rect"].x0 + label["rect"].x1) / 2 for label in labels]
+            left = (centers[index - 1] + centers[index]) / 2 if index > 0 else page_rect.x0
+            right = (centers[index] + centers[index + 1]) / 2 if index + 1 < len(labels) else page_rect.x1
+            regions.append((option["id"], fitz.Rect(left, rect.y0, right, bottom)))
         
-        for page_num in range(len(self.doc)):
-            print(f"Traitement de la page {page_num + 1}/{len(self.doc)}...")
+        return regions
+    
+    def _attach_images(self, question_data: QuizQuestion, options: List[Dict[str, Any]],
+                       images: List[Dict[str, Any]]):
+        """Associer chaque image à l'option qu'elle illustre, selon sa position.
+        
+        Une image est rattachée à une option si son centre tombe dans la bande
+        de l'option, ou (options graphiques) si elle est au-dessus du numéro
+        de l'option, dans sa colonne (bornée à mi-distance des numéros
+        voisins). Une image beaucoup plus haute que la bande de l'option est
+        une illustration. La plus grande des images restantes devient
+        l'illustration de la question.
+        """
+        remaining = []
+        centers = [(option["rect"].x0 + option["rect"].x1) / 2 for option in options if option["label"]]
+        columns = [((centers[i - 1] + center) / 2 if i > 0 else float("-inf"),
+                    (center + centers[i + 1]) / 2 if i + 1 < len(centers) else float("inf"))
+                   for i, center in enumerate(centers)]
+        
+        for img in images:
+            rect = img["rect"]
+            target = None
+            if rect is not None:
+                center_x, center_y = (rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2
+                labels = iter(columns)
+                for option, entry in zip(options, question_data.options):
+                    band = option["rect"]
+                    column = next(labels) if option["label"] else None
+                    if entry.image is not None:
+                        continue
+                    if option["label"]:
+                        if column[0] <= center_x <= column[1] and rect.y1 <= band.y1:
+                            target = entry
+                            break
+                    elif (band.y0 <= center_y <= band.y1 and center_x >= band.x0
+                          and rect.height <= band.height * 2):
+                        target = entry
+                        break
             
-            # Extraire le texte
-            text = self.extract_text_from_page(page_num)
+            if target is not None:
+                target.image = img["path"]
+                target.image_alt = f"Option {target.id}"
+            else:
+                remaining.append(img)
+        
+        if remaining:
+            main_image = max(remaining, key=lambda img: img["rect"].get_area() if img["rect"] is not None else 0)
+            question_data.image = main_image["path"]
+            question_data.image_alt = f"Illustration pour la question {question_data.id}"
+    
+    def _scan_green_regions(self, page: fitz.Page, regions: List[Tuple[str, fitz.Rect]]) -> List[Dict[str, Any]]:
+        """Chercher des pixels verts dans la zone de chaque option (rendu raster).
+        
+        La page est rendue une seule fois en basse résolution ; le masque des
+        pixels verts est calculé d'un bloc avec NumPy puis découpé par zone.
+        """
+        if np is None or not regions:
+            return []
+        
+        instrumentation.count("pdf.green_scans")
+        zoom = GREEN_SCAN_DPI / 72
+        with instrumentation.stage("pdf.green_render"):
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+        pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n).astype(np.int16)
+        red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+        mask = (green >= 0x80) & (green - red >= 0x40) & (green - blue >= 0x30)
+        
+        if not mask.any():
+            return []
+        
+        elements = []
+        for option_id, rect in regions:
+            left, top = max(int(rect.x0 * zoom), 0), max(int(rect.y0 * zoom), 0)
+            right, bottom = int(np.ceil(rect.x1 * zoom)), int(np.ceil(rect.y1 * zoom))
+            region = mask[top:bottom, left:right]
+            if region.sum() >= GREEN_SCAN_MIN_PIXELS:
+                rows, cols = np.nonzero(region)
+                elements.append({
+                    "bbox": ((left + cols.min()) / zoom, (top + rows.min()) / zoom,
+                             (left + cols.max() + 1) / zoom, (top + rows.max() + 1) / zoom),
+                    "text": "",
+                    "source": "raster",
+                    "option": option_id
+                })
+        
+        return elements
+    
+    def process_page(self, page_num: int) -> Optional[QuizQuestion]:
+        """Extraire la question d'une seule page (texte, images, options)."""
+        instrumentation.count("pdf.pages")
+        with instrumentation.stage("pdf.page"):
+            # Extraire les images (avec leur position sur la page)
+            with instrumentation.stage("pdf.extract_images"):
+                images = self.extract_images_from_page(page_num)
             
-            # Extraire les images
-            images = self.extract_images_from_page(page_num)
+            # Parser la question et associer les images par position
+            with instrumentation.stage("pdf.layout"):
+                return self.parse_page_layout(page_num, images)
+    
+    def _cached(self, cache: OrderedDict, page_num: int, load):
+        """Lire une page dans un cache LRU, en la chargeant au besoin."""
+        if not 0 <= page_num < len(self.doc):
+            raise IndexError(f"page {page_num} hors du document ({len(self.doc)} pages)")
+        
+        if page_num in cache:
+            instrumentation.count("pdf.page_cache_hits")
+            cache.move_to_end(page_num)
+            return cache[page_num]
+        
+        instrumentation.count("pdf.page_cache_misses")
+        value = load(page_num)
+        cache[page_num] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+    
+    def page_images(self, page_num: int) -> List[Dict[str, Any]]:
+        """Images d'une page (avec leur position), mises en cache."""
+        return self._cached(self._images_cache, page_num, self.extract_images_from_page)
+    
+    def question(self, page_num: int) -> Optional[QuizQuestion]:
+        """Question d'une seule page (numérotée à partir de 0), ou None.
+        
+        Seule la page demandée est lue ; le résultat est gardé dans un cache
+        LRU de ``cache_size`` pages. La question retournée est une copie :
+        la modifier n'altère pas le cache.
+        """
+        question_data = self._cached(self._question_cache, page_num,
+                                     lambda num: self.parse_page_layout(num, self.page_images(num)))
+        return copy.deepcopy(question_data)
+    
+    def iter_questions(self, pages: Optional[Iterable[int]] = None) -> Iterator[QuizQuestion]:
+        """Parcourir à la demande les questions des pages données (toutes par défaut).
+        
+        Les pages sans question sont ignorées ; chaque page n'est extraite
+        qu'au moment où l'itération l'atteint.
+        """
+        for page_num in range(len(self.doc)) if pages is None else pages:
+            question_data = self.question(page_num)
+            if question_data is not None:
+                yield question_data
+    
+    def extract_pages(self, page_numbers: Sequence[int], workers: int = 1) -> List[Optional[QuizQuestion]]:
+        """Extraire les questions d'une liste de pages.
+        
+        Le résultat est aligné sur ``page_numbers`` (None pour une page sans
+        question). Avec ``workers > 1``, les pages sont réparties en tranches
+        contiguës sur un pool de processus ; chaque processus ouvre son propre
+        document et le résultat est recombiné dans l'ordre des pages,
+        identique à l'extraction séquentielle.
+        """
+        page_numbers = list(page_numbers)
+        
+        if workers <= 1 or len(page_numbers) < 2:
+            results = []
+            for page_num in page_numbers:
+                print(f"Traitement de la page {page_num + 1}/{len(self.doc)}...")
+                results.append(self.process_page(page_num))
+            return results
+        
+        # Plusieurs tranches par processus pour équilibrer la charge
+        # (les pages avec images sont nettement plus lentes)
+        chunk_count = min(len(page_numbers), workers * 4)
+        chunk_size = -(-len(page_numbers) // chunk_count)
+        chunks = [page_numbers[start:start + chunk_size]
+                  for start in range(0, len(page_numbers), chunk_size)]
+        
+        results = []
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(self.pdf_path, str(self.output_dir),
+                                           instrumentation.is_enabled())) as pool:
+            # map() conserve l'ordre des tranches, donc l'ordre des pages ;
+            # les mesures de chaque tranche sont ajoutées à celles du processus
+            for chunk_results, measures in pool.map(_extract_chunk, chunks):
+                results.extend(chunk_results)
+                instrumentation.merge(measures)
+        
+        return results
+    
+    def extract_all_questions(self, workers: int = 1) -> List[QuizQuestion]:
+        """Extraire toutes les questions du PDF."""
+        results = self.extract_pages(range(len(self.doc)), workers=workers)
+        return [question_data for question_data in results if question_data]
+    
+    def page_fingerprint(self, page_num: int) -> str:
+        """Empreinte d'une page : flux de contenu et images référencées."""
+        if page_num in self._fingerprints:
+            return self._fingerprints[page_num]
+        
+        with instrumentation.stage("pdf.fingerprint"):
+            page = self.doc[page_num]
+            h = hashlib.sha1(page.read_contents())
             
-            # Parser la question
-            question_data = self.parse_question_text(text, page_num)
+            for img in page.get_images():
+                xref = img[0]
+                h.update(f"|{xref}:".encode())
+                h.update(self.doc.xref_stream_raw(xref) or b"")
             
-            if question_data:
-                # Ajouter les images si présentes
-                if images:
-                    # Déterminer quelle image est l'illustration principale
-                    # (généralement la plus grande ou celle à droite)
-                    main_image = None
-                    option_images = []
-                    
-                    for img in images:
-                        # Logique simple : si il y a plusieurs images, 
-                        # la première est souvent l'illustration principale
-                        if not main_image:
-                            main_image = img
-                        else:
-                            option_images.append(img)
-                    
-                    if main_image:
-                        question_data["image"] = main_image["path"]
-                        question_data["imageAlt"] = f"Illustration pour la question {question_data['id']}"
-                    
-                    # Associer les images aux options (logique à affiner)
-                    for i, img in enumerate(option_images):
-                        if i < len(question_data["options"]):
-                            question_data["options"][i]["image"] = img["path"]
-                            question_data["options"][i]["imageAlt"] = f"Option {question_data['options'][i]['id']}"
-                
-                questions.append(question_data)
-        
-        return questions
-    
-    def generate_json(self, questions: List[Dict[str, Any]], output_path: str = "src/data/questions.json"):
-        """Générer le fichier JSON final."""
-        quiz_data = {
-            "quiz": {
-                "title": "Quiz de Révision EPSF",
-                "description": f"Testez vos connaissances avec ce quiz interactif pour la licence EPSF - {len(questions)} questions",
-                "questions": questions
-            }
-        }
+            self._fingerprints[page_num] = h.hexdigest()
+            return self._fingerprints[page_num]
+    
+    def extract_incremental(self, output_path: str = "src/data/questions.json",
+                            workers: int = 1, force: bool = False) -> Tuple[List[QuizQuestion], int]:
+        """Ne retraiter que les pages dont l'empreinte a changé.
+        
+        Le manifeste (``<sortie>.manifest.json``) garde l'empreinte et la
+        question extraite de chaque page. Retourne la liste complète des
+        questions et le nombre de pages retraitées ; le JSON de sortie et le
+        manifeste ne sont réécrits que si quelque chose a changé.
+        """
+        manifest_path = manifest_path_for(output_path)
+        fingerprints = [self.page_fingerprint(page_num) for page_num in range(len(self.doc))]
+        
+        previous = None if force else load_manifest(manifest_path)
+        if previous is not None and not Path(output_path).exists():
+            previous = None
+        old_pages = previous["pages"] if previous else []
+        
+        stale = [page_num for page_num, fingerprint in enumerate(fingerprints)
+                 if page_num >= len(old_pages) or old_pages[page_num]["fingerprint"] != fingerprint]
+        
+        pages = [{"fingerprint": fingerprint,
+                  "question": _manifest_question(old_pages[page_num]) if page_num < len(old_pages) else None}
+                 for page_num, fingerprint in enumerate(fingerprints)]
         
-        # Créer le répertoire de sortie si nécessaire
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        for page_num, question_data in zip(stale, self.extract_pages(stale, workers=workers)):
+            pages[page_num]["question"] = question_data
         
-        # Écrire le fichier JSON
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(quiz_data, f, ensure_ascii=False, indent=2)
+        questions = [page["question"] for page in pages if page["question"]]
+        
+        if stale or len(old_pages) != len(pages):
+            self.generate_json(questions, output_path)
+            save_manifest(manifest_path, self.pdf_path, pages)
+        
+        return questions, len(stale)
+    
+    def generate_json(self, questions: List[QuizQuestion], output_path: str = "src/data/questions.json"):
+        """Générer le fichier JSON final (écriture en flux, atomique)."""
+        with instrumentation.stage("write.json"):
+            count = write_quiz(output_path, "Quiz de Révision EPSF", questions)
+        instrumentation.count("write.bytes_written", os.path.getsize(output_path))
         
         print(f"Fichier JSON généré : {output_path}")
-        print(f"Nombre de questions extraites : {len(questions)}")
+        print(f"Nombre de questions extraites : {count}")
     
     def close(self):
-        """Fermer le document PDF."""
+        """Fermer le document PDF et vider les caches de pages."""
         if hasattr(self, 'doc'):
+            self._question_cache.clear()
+            self._images_cache.clear()
             self.doc.close()
 
-def main():
+def manifest_path_for(output_path: str) -> Path:
+    """Chemin du manifeste associé à un fichier JSON de sortie."""
+    output_file = Path(output_path)
+    return output_file.with_name(f"{output_file.stem}.manifest.json")
+
+def load_manifest(manifest_path: Path) -> Optional[Dict[str, Any]]:
+    """Charger un manifeste, ou None s'il est absent ou d'une autre version."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def _manifest_question(page: Dict[str, Any]) -> Optional[QuizQuestion]:
+    """Question d'une page du manifeste, ou None."""
+    return QuizQuestion.from_dict(page["question"]) if page["question"] else None
+
+def save_manifest(manifest_path: Path, pdf_path: str, pages: List[Dict[str, Any]]):
+    """Écrire le manifeste (empreinte et question extraite par page)."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "pdf": pdf_path,
+        "pages": [{"fingerprint": page["fingerprint"],
+                   "question": page["question"].to_dict() if page["question"] else None}
+                  for page in pages]
+    }
+    
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, manifest_path)
+
+# Extracteur propre à chaque processus du pool (voir extract_pages)
+_worker_extractor: Optional[EPSFPDFExtractor] = None
+
+def _init_worker(pdf_path: str, output_dir: str, instrumented: bool = False):
+    """Ouvrir le document une seule fois par processus (fermé à la sortie du processus)."""
+    global _worker_extractor
+    _worker_extractor = EPSFPDFExtractor(pdf_path, output_dir)
+    instrumentation.enable(instrumented)
+    # Les processus du pool ne passent pas par atexit
+    Finalize(None, _worker_extractor.close, exitpriority=10)
+
+def _extract_chunk(page_numbers: List[int]) -> Tuple[List[Optional[QuizQuestion]], Dict[str, Any]]:
+    """Extraire une tranche de pages dans un processus du pool.
+    
+    Retourne aussi les mesures d'instrumentation de la tranche.
+    """
+    instrumentation.reset()
+    results = _worker_extractor.extract_pages(page_numbers)
+    return results, instrumentation.snapshot()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Lire les options de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Extraction des questions du PDF EPSF")
+    parser.add_argument("--pdf", default="public/epsf.pdf",
+                        help="PDF à extraire (défaut : public/epsf.pdf ; plusieurs PDF : batch_extract.py)")
+    parser.add_argument("--output", default="src/data/questions.json",
+                        help="fichier JSON produit (défaut : src/data/questions.json)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="nombre de processus pour l'extraction des pages (défaut : 1)")
+    parser.add_argument("--force", action="store_true",
+                        help="ignorer le manifeste et retraiter toutes les pages")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
     """Fonction principale."""
-    pdf_path = "public/epsf.pdf"
+    args = parse_args(argv)
+    pdf_path = args.pdf
     
     if not os.path.exists(pdf_path):
         print(f"Erreur : Le fichier {pdf_path} n'existe pas.")
@@ -207,20 +901,21 @@ def main():
     print("Extraction des données du PDF EPSF...")
     
     try:
-        extractor = EPSFPDFExtractor(pdf_path)
-        questions = extractor.extract_all_questions()
-        extractor.generate_json(questions)
-        extractor.close()
+        with instrumentation.session(args), EPSFPDFExtractor(pdf_path) as extractor:
+            questions, reprocessed = extractor.extract_incremental(args.output, workers=args.workers, force=args.force)
+        
+        if not reprocessed:
+            print("Aucune page modifiée depuis la dernière extraction.")
         
         print("\n" + "="*50)
         print("EXTRACTION TERMINÉE")
         print("="*50)
-        print(f"✅ {len(questions)} questions extraites")
+        print(f"✅ {len(questions)} questions extraites ({reprocessed} pages retraitées)")
         print("✅ Images sauvegardées dans public/images/")
-        print("✅ Fichier JSON généré dans src/data/questions.json")
+        print(f"✅ Fichier JSON généré dans {args.output}")
         print("\n⚠️  ATTENTION :")
-        print("- Les réponses correctes ne sont pas automatiquement détectées")
-        print("- Vous devrez les ajouter manuellement dans le fichier JSON")
+        print("- Les réponses correctes sont détectées d'après les éléments en vert")
+        print("- Vérifiez les questions sans réponse (\"correctAnswers\": [])")
         print("- Vérifiez que les associations images/options sont correctes")
         
     except Exception as e:
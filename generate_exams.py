@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Génération d'examens blancs pré-calculés à partir de la banque fusionnée
+
+Chaque examen est un tirage reproductible (graine + numéro d'examen) de
+--size questions, stratifié par famille de code (RSP, AEMC, ...) et par
+type (single / multiple) : chaque strate est représentée en proportion de
+sa taille dans la banque. L'ordre des questions et celui des options sont
+mélangés, les ids d'options renumérotés et les réponses correctes
+reportées sur les nouveaux ids.
+
+Les examens sont écrits en petits fichiers JSON statiques (format QuizData,
+noms hachés) avec un index ; l'application charge un examen prêt au lieu de
+mélanger toute la banque côté client.
+
+    python generate_exams.py                               # 20 examens de 40 questions -> public/exams/
+    python generate_exams.py --count 100 --size 40 --seed 2025
+"""
+
+import argparse
+import hashlib
+import random
+import re
+from pathlib import Path
+
+from export_bundles import code_family, dumps_compact, write_atomic
+from quiz_model import load_quiz
+
+DEFAULT_INPUT = Path("src/data/questions_complete.json")
+DEFAULT_OUTPUT_DIR = Path("public/exams")
+DEFAULT_COUNT = 20
+DEFAULT_SIZE = 40
+DEFAULT_SEED = 1
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+
+EXAM_NAME_PATTERN = re.compile(r'^exam-\d+-[0-9a-f]{12}\.json$')
+
+def strata_of(questions):
+    """Regroupe les questions par strate (famille de code, type), dans l'ordre de la banque."""
+    strata = {}
+    for question in questions:
+        strata.setdefault((code_family(question.code), question.type), []).append(question)
+    return strata
+
+def allocate(sizes, total):
+    """Répartit `total` places entre des strates proportionnellement à leur taille.
+
+    Méthode du plus fort reste : chaque strate reçoit la partie entière de
+    sa part, les places restantes vont aux plus grands restes. Aucune strate
+    ne reçoit plus de questions qu'elle n'en contient. Sans aucune question,
+    chaque strate reçoit 0 place.
+    """
+    population = sum(sizes.values())
+    if population == 0:
+        return {key: 0 for key in sizes}
+    total = min(total, population)
+    quotas = {key: size * total / population for key, size in sizes.items()}
+    allocation = {key: int(quota) for key, quota in quotas.items()}
+    remaining = total - sum(allocation.values())
+    # Tri stable : à reste égal, l'ordre des strates départage
+    for key in sorted(quotas, key=lambda key: quotas[key] - allocation[key], reverse=True):
+        if remaining == 0:
+            break
+        if allocation[key] < sizes[key]:
+            allocation[key] += 1
+            remaining -= 1
+    return allocation
+
+def shuffle_options(question, rng):
+    """Copie d'une question aux options mélangées, renumérotées de 1 à n."""
+    options = list(question.options)
+    rng.shuffle(options)
+    new_ids = {option.id: str(position) for position, option in enumerate(options, 1)}
+    return question.replace(
+        options=[option.replace(id=new_ids[option.id]) for option in options],
+        correct_answers=sorted((new_ids[answer] for answer in question.correct_answers), key=int))
+
+def generate_exam(strata, allocation, seed, index):
+    """Tire l'examen numéro `index` ; le résultat ne dépend que de la graine et du numéro."""
+    rng = random.Random(f"{seed}-{index}")
+    selected = []
+    for key, questions in strata.items():
+        selected.extend(rng.sample(questions, allocation[key]))
+    rng.shuffle(selected)
+
+    exam = []
+    for position, question in enumerate(selected, 1):
+        shuffled = shuffle_options(question, rng)
+        shuffled.source_id = question.id
+        shuffled.id = position
+        exam.append(shuffled)
+    return exam
+
+def generate_exams(input_file=DEFAULT_INPUT, output_dir=DEFAULT_OUTPUT_DIR, count=DEFAULT_COUNT,
+                   size=DEFAULT_SIZE, seed=DEFAULT_SEED):
+    """Génère `count` examens et leur index ; retourne l'index (None si la banque est vide)."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    quiz = load_quiz(input_file)
+
+    strata = strata_of(quiz.questions)
+    allocation = allocate({key: len(questions) for key, questions in strata.items()}, size)
+    size = sum(allocation.values())
+    if size == 0:
+        # Banque vide : les examens existants sont laissés en place
+        print(f"❌ {input_file} : aucune question à tirer, aucun examen généré")
+        return None
+
+    index = {
+        "version": INDEX_VERSION,
+        "seed": seed,
+        "size": size,
+        "strata": [{"family": family, "type": question_type, "count": allocation[(family, question_type)]}
+                   for family, question_type in strata],
+        "exams": []
+    }
+
+    written = 0
+    for number in range(count):
+        questions = generate_exam(strata, allocation, seed, number)
+        content = dumps_compact({
+            "quiz": {
+                "title": f"Examen blanc EPSF n°{number + 1}",
+                "description": f"Examen blanc de {size} questions (graine {seed}, tirage {number})",
+                "questions": [question.to_dict() for question in questions]
+            },
+            "exam": {"seed": seed, "index": number}
+        })
+        filename = f"exam-{number}-{hashlib.sha256(content).hexdigest()[:12]}.json"
+        if not (output_dir / filename).exists():
+            write_atomic(output_dir / filename, content)
+            written += 1
+        index["exams"].append({"file": filename, "index": number, "bytes": len(content)})
+
+    write_atomic(output_dir / INDEX_NAME, dumps_compact(index))
+
+    # Supprimer les examens de générations précédentes qui ne sont plus référencés
+    current = {exam["file"] for exam in index["exams"]}
+    removed = 0
+    for path in output_dir.iterdir():
+        if EXAM_NAME_PATTERN.match(path.name) and path.name not in current:
+            path.unlink()
+            removed += 1
+
+    print(f"✅ {count} examens de {size} questions (graine {seed}, {len(strata)} strates) dans {output_dir}")
+    print(f"   {written} fichiers écrits, {count - written} déjà à jour, {removed} obsolètes supprimés")
+    return index
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Génération d'examens blancs EPSF pré-calculés")
+    parser.add_argument('input', nargs='?', default=str(DEFAULT_INPUT),
+                        help=f"banque de questions (défaut : {DEFAULT_INPUT})")
+    parser.add_argument('--output-dir', '-o', default=str(DEFAULT_OUTPUT_DIR),
+                        help=f"répertoire de sortie (défaut : {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT,
+                        help=f"nombre d'examens (défaut : {DEFAULT_COUNT})")
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                        help=f"questions par examen (défaut : {DEFAULT_SIZE})")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help=f"graine des tirages (défaut : {DEFAULT_SEED})")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if generate_exams(args.input, args.output_dir, args.count, args.size, args.seed) is None:
+        raise SystemExit(1)
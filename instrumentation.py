@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chronométrage et compteurs du pipeline de données
+
+Les scripts (extraction PDF, parsers raw_data, fusion) déclarent leurs
+étapes et compteurs :
+
+    with instrumentation.stage("pdf.get_text"):
+        text_dict = page.get_text("dict")
+    instrumentation.count("pdf.images")
+
+Tant que l'instrumentation n'est pas activée, ``stage`` retourne un
+contexte vide partagé et ``count`` ne fait rien : le coût se limite à un
+appel de fonction. Activée (``--run-report`` ou ``--profile`` des scripts),
+elle cumule le nombre d'appels et la durée de chaque étape (durées
+inclusives : une étape imbriquée est comptée aussi dans l'étape parente)
+et produit un rapport JSON ou CSV. ``--profile cpu`` enveloppe l'exécution
+dans cProfile, ``--profile memory`` dans tracemalloc.
+"""
+
+import contextlib
+import cProfile
+import csv
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Lignes affichées pour les profils CPU et mémoire
+PROFILE_TOP = 20
+
+_enabled = False
+# Étape -> [appels, durée cumulée en secondes] ; compteur -> valeur
+_stages = {}
+_counters = {}
+
+class _Stage:
+    """Chronomètre d'une exécution d'étape."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self.start
+        totals = _stages.get(self.name)
+        if totals is None:
+            _stages[self.name] = [1, elapsed]
+        else:
+            totals[0] += 1
+            totals[1] += elapsed
+
+_DISABLED_STAGE = contextlib.nullcontext()
+
+def enable(enabled=True):
+    """Active (ou désactive) l'instrumentation pour tout le processus."""
+    global _enabled
+    _enabled = enabled
+
+def is_enabled():
+    """Indique si l'instrumentation est active."""
+    return _enabled
+
+def stage(name):
+    """Contexte chronométrant une étape (contexte vide si désactivé)."""
+    if not _enabled:
+        return _DISABLED_STAGE
+    return _Stage(name)
+
+def count(name, value=1):
+    """Incrémente un compteur (pages, images, octets écrits, succès de cache...)."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+def reset():
+    """Remet étapes et compteurs à zéro."""
+    _stages.clear()
+    _counters.clear()
+
+def snapshot():
+    """Étapes et compteurs courants, sous forme sérialisable (pour un pool de processus)."""
+    return {"stages": {name: list(totals) for name, totals in _stages.items()},
+            "counters": dict(_counters)}
+
+def merge(data):
+    """Ajoute les mesures d'un autre processus (voir snapshot)."""
+    for name, (calls, seconds) in data["stages"].items():
+        totals = _stages.setdefault(name, [0, 0.0])
+        totals[0] += calls
+        totals[1] += seconds
+    for name, value in data["counters"].items():
+        _counters[name] = _counters.get(name, 0) + value
+
+def report(elapsed=None):
+    """Rapport d'exécution : étapes triées par durée décroissante et compteurs."""
+    stages = [{"stage": name, "calls": calls, "seconds": round(seconds, 6),
+               "mean_ms": round(seconds / calls * 1000, 4) if calls else 0.0}
+              for name, (calls, seconds) in sorted(_stages.items(), key=lambda item: -item[1][1])]
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "command": " ".join(sys.argv),
+        "elapsed": round(elapsed, 6) if elapsed is not None else None,
+        "stages": stages,
+        "counters": dict(sorted(_counters.items()))
+    }
+
+def write_report(path, data):
+    """Écrit un rapport en CSV (extension .csv) ou en JSON."""
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "name", "calls", "seconds", "mean_ms", "value"])
+            for row in data["stages"]:
+                writer.writerow(["stage", row["stage"], row["calls"], row["seconds"], row["mean_ms"], ""])
+            for name, value in data["counters"].items():
+                writer.writerow(["counter", name, "", "", "", value])
+            if data["elapsed"] is not None:
+                writer.writerow(["total", "elapsed", "", data["elapsed"], "", ""])
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+@contextlib.contextmanager
+def profiling(mode, output=None):
+    """Enveloppe un bloc dans cProfile ('cpu') ou tracemalloc ('memory').
+
+    Le résumé est écrit sur stderr ; avec ``output``, le profil cProfile
+    (format pstats) ou le détail tracemalloc y est enregistré.
+    """
+    if mode is None:
+        yield
+        return
+
+    if mode == 'cpu':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        return
+
+    if mode != 'memory':
+        raise ValueError(f"mode de profilage inconnu : {mode}")
+
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics('lineno')
+        tracemalloc.stop()
+        count("memory.peak_bytes", peak)
+        lines = [f"Pic tracemalloc : {peak / 1024 / 1024:.1f} Mo (restant : {current / 1024 / 1024:.1f} Mo)"]
+        lines.extend(str(statistic) for statistic in statistics[:PROFILE_TOP])
+        print("\n".join(lines), file=sys.stderr)
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+
+def add_arguments(parser):
+    """Ajoute --run-report, --profile et --profile-output à un parser argparse."""
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument('--run-report', metavar='FICHIER',
+                       help="écrire le rapport d'exécution (étapes, compteurs) en JSON ou CSV (.csv)")
+    group.add_argument('--profile', choices=('cpu', 'memory'),
+                       help="profiler l'exécution avec cProfile (cpu) ou tracemalloc (memory)")
+    group.add_argument('--profile-output', metavar='FICHIER',
+                       help="fichier où enregistrer le profil (pstats pour cpu, texte pour memory)")
+
+@contextlib.contextmanager
+def session(args):
+    """Exécution instrumentée selon les options de add_arguments.
+
+    Sans --run-report ni --profile, le bloc s'exécute sans instrumentation.
+    """
+    report_path = getattr(args, 'run_report', None)
+    mode = getattr(args, 'profile', None)
+    if not (report_path or mode):
+        yield
+        return
+
+    enable()
+    reset()
+    start = time.perf_counter()
+    try:
+        with profiling(mode, getattr(args, 'profile_output', None)):
+            yield
+    finally:
+        data = report(time.perf_counter() - start)
+        enable(False)
+        if report_path:
+            write_report(report_path, data)
+            print(f"📝 Rapport d'exécution : {report_path}", file=sys.stderr)
+        else:
+            for row in data["stages"]:
+                print(f"{row['stage']:<24} {row['calls']:>8} appels {row['seconds']:>10.3f} s", file=sys.stderr)
+            for name, value in data["counters"].items():
+                print(f"{name:<24} {value:>8}", file=sys.stderr)
@@ -1,124 +1,246 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Script pour fusionner tous les fichiers de questions JSON dans src/data/
+Script pour fusionner des fichiers de questions JSON (par défaut ceux de src/data/)
+
+Les questions sont indexées en une seule passe sur leur code et sur un hash
+de leur contenu normalisé (question + options) :
+- les doublons exacts (même contenu, même réponse) sont ignorés ;
+- un même contenu avec une réponse différente est signalé comme conflit ;
+- un même code utilisé pour deux questions différentes est signalé ;
+- les quasi-doublons (formulation légèrement différente) sont repérés par
+  MinHash + LSH (near_duplicates.py) et signalés pour revue.
 """
 
+import argparse
+import hashlib
 import json
 import os
 from pathlib import Path
 
-def load_json_file(filepath):
-    """Charge un fichier JSON et retourne son contenu"""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Erreur lors du chargement de {filepath}: {e}")
-        return None
+import instrumentation
+from near_duplicates import NEAR_DUPLICATE_THRESHOLD, LSHIndex, MinHasher, similarity
+from quiz_model import WHITESPACE_PATTERN, answer_key, load_quiz_file, normalize_text, resolve_inputs
+from quiz_writer import QuizWriter
 
-def merge_questions():
-    """Fusionne toutes les questions des fichiers JSON dans src/data/"""
-    
-    # Répertoire des données
-    data_dir = Path("src/data")
-    
-    # Fichiers JSON à fusionner
-    json_files = [
-        "questions_merged.json",
-        "questions_supp.json", 
-        "questions_supp_2.json"
-    ]
-    
-    # Structure de base pour le fichier fusionné
-    merged_data = {
-        "quiz": {
-            "title": "Quiz de Révision EPSF - Collection Complète",
-            "description": "Testez vos connaissances avec ce quiz interactif pour la licence EPSF - Collection complète fusionnée",
-            "questions": []
-        }
-    }
+# Répertoire des données et fichiers fusionnés par défaut
+DATA_DIR = Path("src/data")
+DEFAULT_INPUTS = [
+    DATA_DIR / "questions_merged.json",
+    DATA_DIR / "questions_supp.json",
+    DATA_DIR / "questions_supp_2.json"
+]
+DEFAULT_OUTPUT = DATA_DIR / "questions_complete.json"
+
+# Quasi-doublons détaillés dans la sortie (tous figurent dans le rapport)
+NEAR_DUPLICATES_SHOWN = 10
+
+def normalize_code(code):
+    """Normalise un code de question ("AEMC 8" et "AEMC8" sont le même code)."""
+    return WHITESPACE_PATTERN.sub('', code or '').upper()
+
+def content_hash(question):
+    """Hash du contenu normalisé d'une question (énoncé + options, sans ordre).
     
-    current_id = 1
-    total_questions = 0
+    Les images font partie du contenu : un même énoncé illustré par deux
+    signaux différents donne deux questions distinctes.
+    """
+    options = sorted(f"{normalize_text(option.text)}\x1e{option.image or ''}" for option in question.options)
+    content = '\x1f'.join([normalize_text(question.question), question.image or ''] + options)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def merge_questions(inputs=None, output_file=DEFAULT_OUTPUT, report_file=None,
+                    near_threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Fusionne les questions des fichiers JSON donnés
     
-    print("Début de la fusion des questions...")
+    Retourne le rapport de fusion (doublons, conflits, collisions de codes,
+    quasi-doublons de similarité >= ``near_threshold``).
+    """
+    json_files = resolve_inputs(inputs or DEFAULT_INPUTS, output_file)
     
-    # Parcourir chaque fichier JSON
-    for json_file in json_files:
-        filepath = data_dir / json_file
-        
-        if not filepath.exists():
-            print(f"Fichier non trouvé: {filepath}")
-            continue
-            
-        print(f"Traitement de {json_file}...")
-        
-        # Charger le fichier JSON
-        data = load_json_file(filepath)
-        if not data or 'quiz' not in data or 'questions' not in data['quiz']:
-            print(f"Structure invalide dans {json_file}")
-            continue
-        
-        # Ajouter les questions avec des IDs uniques
-        questions = data['quiz']['questions']
-        for question in questions:
-            # Créer une copie de la question avec un nouvel ID
-            new_question = question.copy()
-            new_question['id'] = current_id
-            
-            # Ajouter la question à la collection fusionnée
-            merged_data['quiz']['questions'].append(new_question)
-            current_id += 1
-            total_questions += 1
-        
-        print(f"  -> {len(questions)} questions ajoutées")
+    # Index : hash de contenu -> question retenue, code -> hash de contenu
+    by_content = {}
+    by_code = {}
+    # Seaux LSH des signatures MinHash des questions retenues
+    hasher = MinHasher()
+    lsh = LSHIndex()
+    kept_signatures = []
+    kept_sources = []
     
-    # Mettre à jour la description avec le nombre total
-    merged_data['quiz']['description'] = f"Testez vos connaissances avec ce quiz interactif pour la licence EPSF - {total_questions} questions"
+    report = {
+        "inputs": [str(path) for path in json_files],
+        "output": str(output_file),
+        "read": 0,
+        "written": 0,
+        "duplicates": [],
+        "answer_conflicts": [],
+        "code_collisions": [],
+        "near_duplicates": []
+    }
+    
+    current_id = 1
     
-    # Sauvegarder le fichier fusionné
-    output_file = data_dir / "questions_complete.json"
+    print("Début de la fusion des questions...")
     
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=2)
+        # Fichier fusionné, écrit en flux (et remplacé atomiquement à la fin)
+        with QuizWriter(output_file, "Quiz de Révision EPSF - Collection Complète") as writer:
+            # Parcourir chaque fichier JSON
+            for filepath in json_files:
+                if not filepath.exists():
+                    print(f"Fichier non trouvé: {filepath}")
+                    continue
+                
+                print(f"Traitement de {filepath.name}...")
+                
+                # Charger le fichier JSON
+                with instrumentation.stage("merge.load"):
+                    quiz = load_quiz_file(filepath)
+                if quiz is None:
+                    continue
+                
+                added = 0
+                questions = quiz.questions
+                with instrumentation.stage("merge.signatures"):
+                    signatures = hasher.signatures(questions)
+                for question, signature in zip(questions, signatures):
+                    report["read"] += 1
+                    source = {"file": str(filepath), "id": question.id, "code": question.code or ''}
+                    digest = content_hash(question)
+                    key = answer_key(question)
+                    
+                    kept = by_content.get(digest)
+                    if kept is not None:
+                        if kept["answer_key"] == key:
+                            report["duplicates"].append({"kept": kept["source"], "dropped": source})
+                        else:
+                            report["answer_conflicts"].append({
+                                "kept": kept["source"], "dropped": source,
+                                "kept_answers": kept["answers"],
+                                "dropped_answers": question.correct_answers
+                            })
+                        continue
+                    
+                    code = normalize_code(question.code)
+                    if code and code in by_code:
+                        report["code_collisions"].append({
+                            "code": question.code,
+                            "first": by_content[by_code[code]]["source"],
+                            "other": source
+                        })
+                    elif code:
+                        by_code[code] = digest
+                    
+                    for doc in lsh.candidates(signature):
+                        score = similarity(signature, kept_signatures[doc])
+                        if score >= near_threshold:
+                            report["near_duplicates"].append({
+                                "kept": kept_sources[doc], "other": source,
+                                "similarity": round(score, 3)
+                            })
+                            break
+                    lsh.add(len(kept_signatures), signature)
+                    kept_signatures.append(signature)
+                    kept_sources.append(source)
+                    
+                    by_content[digest] = {
+                        "source": source,
+                        "answer_key": key,
+                        "answers": question.correct_answers
+                    }
+                    
+                    # Renuméroter la question (chargée pour cette fusion seulement)
+                    question.id = current_id
+                    writer.write(question)
+                    current_id += 1
+                    added += 1
+                
+                print(f"  -> {added} questions ajoutées")
+        
+        report["written"] = writer.count
+        for key in ("read", "written"):
+            instrumentation.count(f"merge.{key}", report[key])
+        for key in ("duplicates", "answer_conflicts", "code_collisions", "near_duplicates"):
+            instrumentation.count(f"merge.{key}", len(report[key]))
+        instrumentation.count("merge.bytes_written", os.path.getsize(output_file))
         
         print(f"\n✅ Fusion terminée avec succès!")
         print(f"📁 Fichier de sortie: {output_file}")
-        print(f"📊 Total des questions: {total_questions}")
-        
-        # Vérification des codes uniques
-        codes = [q.get('code', '') for q in merged_data['quiz']['questions']]
-        unique_codes = set(codes)
+        print(f"📊 Total des questions: {report['written']} (sur {report['read']} lues)")
         
-        if len(codes) != len(unique_codes):
-            print(f"⚠️  Attention: {len(codes) - len(unique_codes)} codes dupliqués détectés")
+        if report["duplicates"]:
+            print(f"♻️  {len(report['duplicates'])} doublons exacts ignorés")
+        if report["answer_conflicts"]:
+            print(f"⚠️  Attention: {len(report['answer_conflicts'])} questions identiques avec des réponses différentes")
+            for conflict in report["answer_conflicts"]:
+                print(f"   - {conflict['kept']['code']} ({conflict['kept']['file']}) : {conflict['kept_answers']}"
+                      f" / {conflict['dropped']['code']} ({conflict['dropped']['file']}) : {conflict['dropped_answers']}")
+        if report["near_duplicates"]:
+            print(f"🔎 {len(report['near_duplicates'])} quasi-doublons à vérifier (conservés)")
+            for near in report["near_duplicates"][:NEAR_DUPLICATES_SHOWN]:
+                print(f"   - {near['kept']['code']} ({near['kept']['file']}) ~ "
+                      f"{near['other']['code']} ({near['other']['file']}) : {near['similarity']}")
+            if len(report["near_duplicates"]) > NEAR_DUPLICATES_SHOWN:
+                print("   ... (voir le rapport de fusion)")
+        if report["code_collisions"]:
+            print(f"⚠️  Attention: {len(report['code_collisions'])} codes dupliqués détectés")
         else:
             print(f"✅ Tous les codes sont uniques")
-            
+    
     except Exception as e:
         print(f"❌ Erreur lors de la sauvegarde: {e}")
+        report["error"] = str(e)
+    
+    if report_file:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📝 Rapport de fusion: {report_file}")
+    
+    return report
 
 def show_summary():
     """Affiche un résumé des fichiers dans src/data/"""
-    data_dir = Path("src/data")
+    data_dir = DATA_DIR
     
     print("\n📋 Résumé des fichiers dans src/data/:")
     print("-" * 50)
     
     for file in data_dir.glob("*.json"):
         try:
-            data = load_json_file(file)
-            if data and 'quiz' in data and 'questions' in data['quiz']:
-                count = len(data['quiz']['questions'])
-                print(f"📄 {file.name}: {count} questions")
+            quiz = load_quiz_file(file)
+            if quiz is not None:
+                print(f"📄 {file.name}: {len(quiz.questions)} questions")
             else:
                 print(f"📄 {file.name}: structure invalide")
         except:
             print(f"📄 {file.name}: erreur de lecture")
+    
+    # Banques binaires (question_store.py) : seul l'en-tête et la colonne des types sont lus
+    from question_store import QuestionStore
+    for file in data_dir.glob("*.qstore"):
+        try:
+            with QuestionStore(file) as store:
+                print(f"🗃️  {file.name}: {len(store)} questions ({store.count_by_type()['multiple']} à choix multiple)")
+        except (OSError, ValueError):
+            print(f"🗃️  {file.name}: erreur de lecture")
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Fusion des fichiers de questions EPSF")
+    parser.add_argument('inputs', nargs='*',
+                        help="fichiers ou motifs glob à fusionner (défaut : questions_merged.json, "
+                             "questions_supp.json et questions_supp_2.json dans src/data/)")
+    parser.add_argument('--output', '-o', default=str(DEFAULT_OUTPUT),
+                        help=f"fichier fusionné (défaut : {DEFAULT_OUTPUT})")
+    parser.add_argument('--report', help="fichier JSON où écrire le rapport de fusion")
+    parser.add_argument('--near-threshold', type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                        help=f"similarité à partir de laquelle signaler un quasi-doublon (défaut : {NEAR_DUPLICATE_THRESHOLD})")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    
     print("🔄 Script de fusion des questions EPSF")
     print("=" * 50)
     
@@ -126,6 +248,9 @@ if __name__ == "__main__":
     show_summary()
     
     # Effectuer la fusion
-    merge_questions()
+    with instrumentation.session(args), instrumentation.stage("merge.run"):
+        report = merge_questions(args.inputs, args.output, args.report, args.near_threshold)
     
-    print("\n🎯 Script terminé!")
\ No newline at end of file
+    print("\n🎯 Script terminé!")
+    if "error" in report:
+        raise SystemExit(1)
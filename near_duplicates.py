@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Détection des quasi-doublons entre banques de questions (MinHash + LSH)
+
+Une même question EPSF apparaît souvent dans plusieurs fichiers avec une
+formulation ou une ponctuation légèrement différente. Chaque question est
+réduite à l'ensemble de ses shingles (suites de 3 mots normalisés de
+l'énoncé et de chaque option, plus les images) puis à une signature
+MinHash ; les signatures sont réparties dans des seaux LSH par bandes, et
+seules les questions qui partagent un seau sont comparées. Le coût reste
+linéaire en nombre de questions, sans comparaison de toutes les paires.
+
+Les questions proches sont regroupées en grappes (union-find) et un rapport
+de revue est produit :
+
+    python near_duplicates.py                       # toutes les banques de src/data/
+    python near_duplicates.py a.json b.json --report grappes.json
+"""
+
+import argparse
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from quiz_model import answer_key, load_quiz_file, resolve_inputs
+from search_index import tokenize
+
+DATA_DIR = Path("src/data")
+
+# Signature MinHash : NUM_PERM permutations (a * x + b) mod MERSENNE_PRIME
+NUM_PERM = 128
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 3
+
+# LSH : BANDS bandes de ROWS valeurs ; deux questions de similarité s
+# partagent un seau avec une probabilité 1 - (1 - s^ROWS)^BANDS
+# (s = 0.7 -> plus de 99 %, s = 0.4 -> environ 55 %)
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Similarité de Jaccard estimée au-delà de laquelle deux questions sont
+# proches (aussi le seuil de signalement de merge_questions.py)
+NEAR_DUPLICATE_THRESHOLD = 0.7
+
+# Membres gardés par seau : au-delà, les nouveaux venus sont presque
+# toujours déjà dans la grappe des premiers (borne le coût par question)
+BUCKET_CAPACITY = 8
+
+# Questions dont les signatures sont calculées ensemble (mémoire bornée)
+SIGNATURE_BATCH = 1024
+
+def shingles(question):
+    """Ensemble des empreintes (crc32) des shingles d'une question.
+
+    Les shingles sont calculés séparément pour l'énoncé et chaque option :
+    l'ordre des options n'a pas d'influence. Le code n'en fait pas partie
+    (il varie d'une banque à l'autre), les images si.
+    """
+    parts = [question.question] + [option.text for option in question.options]
+    result = set()
+    for part in parts:
+        tokens = tokenize(part)
+        if len(tokens) < SHINGLE_SIZE:
+            if tokens:
+                result.add(' '.join(tokens))
+            continue
+        for start in range(len(tokens) - SHINGLE_SIZE + 1):
+            result.add(' '.join(tokens[start:start + SHINGLE_SIZE]))
+
+    images = [question.image] + [option.image for option in question.options]
+    result.update(f"image:{image}" for image in images if image)
+    return {zlib.crc32(shingle.encode('utf-8')) for shingle in result}
+
+class MinHasher:
+    """Calcule les signatures MinHash (permutations tirées d'une graine fixe)."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signatures(self, questions):
+        """Signatures d'une liste de questions : tableau (len(questions), num_perm).
+
+        Les shingles de plusieurs questions sont hachés en une seule opération
+        vectorisée, puis réduits au minimum question par question.
+        """
+        questions = list(questions)
+        # Valeurs < 2^31 : stockées sur 32 bits pour réduire la mémoire
+        result = np.full((len(questions), len(self.a)), MERSENNE_PRIME, dtype=np.uint32)
+
+        for start in range(0, len(questions), SIGNATURE_BATCH):
+            sets = [shingles(question) for question in questions[start:start + SIGNATURE_BATCH]]
+            sizes = np.array([len(values) for values in sets])
+            filled = np.flatnonzero(sizes)
+            if not len(filled):
+                continue
+            values = np.fromiter((value for values in sets for value in values), dtype=np.uint64,
+                                 count=int(sizes.sum()))
+            hashed = (self.a * values + self.b) % MERSENNE_PRIME
+            offsets = np.concatenate(([0], np.cumsum(sizes[filled])[:-1]))
+            result[start + filled] = np.minimum.reduceat(hashed, offsets, axis=1).T
+
+        return result
+
+def similarity(signature, other):
+    """Similarité de Jaccard estimée par deux signatures."""
+    return float(np.count_nonzero(signature == other)) / len(signature)
+
+class LSHIndex:
+    """Seaux LSH : (bande, valeurs de la bande) -> premiers documents du seau."""
+
+    def __init__(self, bands=BANDS, rows=ROWS, capacity=BUCKET_CAPACITY):
+        self.bands = bands
+        self.rows = rows
+        self.capacity = capacity
+        self.buckets = {}
+
+    def _keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def candidates(self, signature):
+        """Documents partageant au moins un seau avec la signature (dans l'ordre d'ajout)."""
+        found = {}
+        for key in self._keys(signature):
+            for doc in self.buckets.get(key, ()):
+                found[doc] = None
+        return list(found)
+
+    def add(self, doc, signature):
+        """Range un document dans les seaux de sa signature."""
+        for key in self._keys(signature):
+            members = self.buckets.setdefault(key, [])
+            if len(members) < self.capacity:
+                members.append(doc)
+
+def find_clusters(questions, threshold=NEAR_DUPLICATE_THRESHOLD, hasher=None):
+    """Grappes de questions proches : listes d'index dans ``questions`` (taille >= 2).
+
+    Retourne aussi les signatures, pour estimer les similarités du rapport.
+    """
+    hasher = hasher or MinHasher()
+    signatures = hasher.signatures(questions)
+    index = LSHIndex()
+    parent = list(range(len(signatures)))
+
+    def find(doc):
+        while parent[doc] != doc:
+            parent[doc] = parent[parent[doc]]
+            doc = parent[doc]
+        return doc
+
+    for doc, signature in enumerate(signatures):
+        for candidate in index.candidates(signature):
+            root, other = find(doc), find(candidate)
+            if root != other and similarity(signature, signatures[candidate]) >= threshold:
+                parent[max(root, other)] = min(root, other)
+        index.add(doc, signature)
+
+    groups = {}
+    for doc in range(len(signatures)):
+        groups.setdefault(find(doc), []).append(doc)
+    return [members for members in groups.values() if len(members) > 1], signatures
+
+def cluster_report(items, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Rapport de revue des grappes pour des couples (source, question).
+
+    ``source`` décrit l'origine de la question (fichier, id, code). Chaque
+    grappe indique la similarité estimée de ses membres avec le premier et
+    si leurs réponses correctes concordent.
+    """
+    items = list(items)
+    clusters, signatures = find_clusters([question for _, question in items], threshold)
+
+    report = {"questions": len(items), "threshold": threshold, "clusters": []}
+    for members in clusters:
+        first = members[0]
+        keys = {answer_key(items[doc][1]) for doc in members}
+        report["clusters"].append({
+            "size": len(members),
+            "answers_agree": len(keys) == 1,
+            "members": [dict(items[doc][0],
+                             question=items[doc][1].question,
+                             similarity=round(similarity(signatures[first], signatures[doc]), 3))
+                        for doc in members]
+        })
+    return report
+
+def load_items(inputs):
+    """Couples (source, QuizQuestion) de tous les fichiers de quiz donnés."""
+    items = []
+    for filepath in resolve_inputs(inputs):
+        quiz = load_quiz_file(filepath)
+        if quiz is None:
+            continue
+        for question in quiz.questions:
+            items.append(({"file": str(filepath), "id": question.id, "code": question.code or ''}, question))
+    return items
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Détection des quasi-doublons entre banques de questions EPSF")
+    parser.add_argument('inputs', nargs='*', default=[str(DATA_DIR / "*.json")],
+                        help="fichiers ou motifs glob à comparer (défaut : src/data/*.json)")
+    parser.add_argument('--threshold', type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                        help=f"similarité de Jaccard minimale (défaut : {NEAR_DUPLICATE_THRESHOLD})")
+    parser.add_argument('--report', help="fichier JSON où écrire le rapport de revue")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    items = load_items(args.inputs)
+    report = cluster_report(items, args.threshold)
+
+    print(f"🔎 {report['questions']} questions, {len(report['clusters'])} grappes de quasi-doublons")
+    for cluster in report["clusters"]:
+        flag = "" if cluster["answers_agree"] else "  ⚠️  réponses différentes"
+        print(f"\n- {cluster['size']} questions{flag}")
+        for member in cluster["members"]:
+            print(f"   {member['similarity']:.2f}  {member['code']:<10} ({member['file']}) {member['question'][:70]}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Rapport de revue: {args.report}")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optimisation des images du quiz (WebP / AVIF, tailles multiples, dimensions)
+
+Pour chaque image référencée par un fichier de quiz (question ou option) :
+- des versions WebP (et AVIF avec --avif) sont générées à plusieurs
+  largeurs dans public/images_optimized/ ; le PNG d'origine reste le
+  format de repli (champ "image" inchangé) ;
+- la largeur, la hauteur, un aperçu flou minuscule (data URI) et les
+  srcset des versions optimisées sont ajoutés à l'entrée du quiz.
+
+Les versions sont nommées d'après le nom de l'image et un hash de son chemin
+dans public/ : deux images de même nom dans des répertoires différents ne
+s'écrasent pas. Les images sont traitées en parallèle ; une image dont les
+versions sont à jour (même taille et même date que lors du dernier passage,
+fichiers générés toujours présents) est ignorée. Une image illisible est
+signalée sans interrompre le traitement des autres ; comme une image
+introuvable, elle perd les champs ajoutés lors d'un passage précédent.
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, features
+
+from quiz_model import load_quiz
+from quiz_writer import atomic_output, write_quiz
+
+PUBLIC_DIR = Path("public")
+OUTPUT_SUBDIR = "images_optimized"
+METADATA_NAME = "metadata.json"
+DEFAULT_INPUT = Path("src/data/questions_complete.json")
+
+# Largeurs générées (l'image d'origine est toujours générée à sa taille)
+DEFAULT_WIDTHS = (320, 640, 960)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+# Aperçu flou : plus grand côté en pixels et qualité
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+# Version du format des métadonnées : à incrémenter si les paramètres changent
+METADATA_VERSION = 2
+
+def target_widths(width, widths):
+    """Largeurs à générer pour une image de largeur `width` (jamais d'agrandissement)."""
+    return sorted({w for w in widths if w < width} | {width})
+
+def output_name(image_path):
+    """Préfixe des versions d'une image : son nom et un hash de son chemin public."""
+    digest = hashlib.sha1(image_path.encode('utf-8')).hexdigest()[:8]
+    return f"{Path(image_path).stem}-{digest}"
+
+def placeholder_data_url(image):
+    """Aperçu flou minuscule en data URI WebP."""
+    preview = image.copy()
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = io.BytesIO()
+    preview.save(buffer, "WEBP", quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def optimize_image(source, output_dir, public_url, widths, avif, name):
+    """Génère les versions d'une image (fichiers `name`-<largeur>) ; retourne ses métadonnées.
+
+    Fonction exécutée dans les processus du pool : arguments et résultat
+    sont de simples chaînes, nombres et dictionnaires.
+    """
+    source = Path(source)
+    output_dir = Path(output_dir)
+
+    with Image.open(source) as opened:
+        image = opened.convert("RGBA" if opened.mode in ("RGBA", "LA", "P") else "RGB")
+
+    width, height = image.size
+    formats = [("webp", "WEBP", {"quality": WEBP_QUALITY, "method": 6})]
+    if avif:
+        formats.append(("avif", "AVIF", {"quality": AVIF_QUALITY}))
+
+    srcsets = {}
+    files = []
+    for extension, pil_format, options in formats:
+        entries = []
+        for target in target_widths(width, widths):
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), Image.LANCZOS)
+            filename = f"{name}-{target}.{extension}"
+            tmp_path = output_dir / f".{filename}.{os.getpid()}.tmp"
+            resized.save(tmp_path, pil_format, **options)
+            os.replace(tmp_path, output_dir / filename)
+            files.append(filename)
+            entries.append(f"{public_url}/{filename} {target}w")
+        srcsets[extension] = ", ".join(entries)
+
+    stat = source.stat()
+    return {
+        "version": METADATA_VERSION,
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "widths": list(widths),
+        "avif": avif,
+        "width": width,
+        "height": height,
+        "placeholder": placeholder_data_url(image),
+        "srcset": srcsets,
+        "files": files
+    }
+
+def is_up_to_date(metadata, source, output_dir, widths, avif):
+    """Indique si les versions d'une image correspondent à la source et aux paramètres, et existent."""
+    if not metadata or metadata.get("version") != METADATA_VERSION:
+        return False
+    stat = source.stat()
+    return (metadata["mtime"] == stat.st_mtime_ns and metadata["size"] == stat.st_size
+            and metadata["widths"] == list(widths) and metadata["avif"] == avif
+            and all((output_dir / filename).is_file() for filename in metadata["files"]))
+
+def iter_image_entries(questions):
+    """Produit toutes les entrées (questions et options) qui ont une image."""
+    for question in questions:
+        if question.image:
+            yield question
+        for option in question.options:
+            if option.image:
+                yield option
+
+def apply_metadata(entry, metadata):
+    """Ajoute dimensions, aperçu et srcset à une entrée de quiz."""
+    entry.image_width = metadata["width"]
+    entry.image_height = metadata["height"]
+    entry.image_placeholder = metadata["placeholder"]
+    entry.image_srcset = metadata["srcset"]
+
+def clear_metadata(entry):
+    """Retire d'une entrée de quiz les champs d'une image qui n'a pas pu être optimisée."""
+    entry.image_width = None
+    entry.image_height = None
+    entry.image_placeholder = None
+    entry.image_srcset = None
+
+def load_metadata(path):
+    """Métadonnées du dernier passage (chemin d'image -> métadonnées)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def optimize_images(input_file=DEFAULT_INPUT, public_dir=PUBLIC_DIR, widths=DEFAULT_WIDTHS,
+                    avif=False, workers=None):
+    """Optimise les images d'un fichier de quiz et y ajoute leurs métadonnées."""
+    public_dir = Path(public_dir)
+    output_dir = public_dir / OUTPUT_SUBDIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    public_url = "/" + OUTPUT_SUBDIR
+
+    if avif and not features.check("avif"):
+        print("⚠️  AVIF non disponible dans cette version de Pillow, seul WebP est généré")
+        avif = False
+
+    quiz = load_quiz(input_file)
+
+    metadata_path = output_dir / METADATA_NAME
+    metadata = load_metadata(metadata_path)
+
+    # Images distinctes référencées, et celles à (re)générer
+    images = sorted({entry.image for entry in iter_image_entries(quiz.questions)})
+    missing = [path for path in images if not (public_dir / path.lstrip('/')).is_file()]
+    for path in missing:
+        print(f"⚠️  Image introuvable : {path}")
+        metadata.pop(path, None)
+    pending = [path for path in images if path not in missing
+               and not is_up_to_date(metadata.get(path), public_dir / path.lstrip('/'), output_dir, widths, avif)]
+
+    failed = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                path: pool.submit(optimize_image, str(public_dir / path.lstrip('/')), str(output_dir),
+                                  public_url, tuple(widths), avif, output_name(path))
+                for path in pending
+            }
+            for path, future in futures.items():
+                try:
+                    metadata[path] = future.result()
+                except Exception as e:
+                    # Image illisible ou corrompue : les autres sont traitées quand même
+                    print(f"❌ Échec de l'optimisation de {path} : {e}")
+                    metadata.pop(path, None)
+                    failed.append(path)
+
+    with atomic_output(metadata_path) as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    # Images introuvables ou en échec : pas de dimensions ni de srcset périmés
+    for entry in iter_image_entries(quiz.questions):
+        if entry.image in metadata:
+            apply_metadata(entry, metadata[entry.image])
+        else:
+            clear_metadata(entry)
+
+    write_quiz(input_file, quiz.title, quiz.questions, quiz.description)
+
+    print(f"✅ {len(images)} images référencées : {len(pending) - len(failed)} optimisées, "
+          f"{len(images) - len(pending) - len(missing)} déjà à jour, {len(missing)} introuvables, "
+          f"{len(failed)} en échec")
+    print(f"📁 Versions optimisées : {output_dir}")
+    return len(pending) - len(failed)
+
+def parse_args(argv=None):
+    """Lit les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Optimisation des images du quiz EPSF")
+    parser.add_argument('input', nargs='?', default=str(DEFAULT_INPUT),
+                        help=f"fichier de quiz à enrichir (défaut : {DEFAULT_INPUT})")
+    parser.add_argument('--public-dir', default=str(PUBLIC_DIR),
+                        help="répertoire public de l'application (défaut : public)")
+    parser.add_argument('--widths', default=",".join(str(width) for width in DEFAULT_WIDTHS),
+                        help="largeurs générées, séparées par des virgules (défaut : 320,640,960)")
+    parser.add_argument('--avif', action='store_true', help="générer aussi des versions AVIF")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="nombre de processus (défaut : nombre de cœurs)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    optimize_images(args.input, args.public_dir,
+                    tuple(int(width) for width in args.widths.split(',') if width),
+                    args.avif, args.workers)
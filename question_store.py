@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage binaire en colonnes de la banque de questions (.qstore)
+
+Le format reprend le schéma de src/types/quiz.ts sous forme de colonnes
+de taille fixe, lues sans désérialisation :
+
+- une table de chaînes internées (textes, options, codes, images) :
+  offsets u32 puis un bloc UTF-8 ; chaque texte n'y figure qu'une fois ;
+- une colonne par champ de question (id, énoncé, code, image, type...) ;
+  les réponses correctes sont un masque de bits sur les options ;
+- une table d'offsets vers les colonnes des options de chaque question ;
+- les champs supplémentaires (dimensions d'image, srcset...) en JSON dans
+  la table de chaînes, pour un aller-retour sans perte.
+
+Le chargeur projette le fichier en mémoire (mmap) : compter, filtrer par
+type ou par code et accéder à une question quelconque ne décode que les
+champs lus, via des vues à __slots__. Le JSON reste le format de
+l'application web (commande export).
+
+    python question_store.py build                 # src/data/questions_complete.json -> .qstore
+    python question_store.py info src/data/questions_complete.qstore
+    python question_store.py export src/data/questions_complete.qstore -o copie.json
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+import quiz_model
+from quiz_model import load_quiz
+from quiz_writer import atomic_output, write_quiz
+
+MAGIC = b"EPSFQST\0"
+STORE_VERSION = 1
+# magic, version, questions, options, chaînes, titre, description
+HEADER = struct.Struct('<8sIIIIII')
+# Index de chaîne d'un champ absent
+NONE = 0xFFFFFFFF
+ALIGNMENT = 8
+
+TYPES = ("single", "multiple")
+# Champs des colonnes ; les autres champs vont dans la colonne "extra"
+QUESTION_FIELDS = ("id", "question", "type", "options", "correctAnswers", "code", "image", "imageAlt")
+OPTION_FIELDS = ("id", "text", "image", "imageAlt")
+MAX_OPTIONS = 64
+
+DEFAULT_INPUT = Path("src/data/questions_complete.json")
+
+def _layout(questions, options, strings):
+    """Sections du fichier, dans l'ordre : (nom, code array, longueur)."""
+    return [
+        ("string_offsets", 'I', strings + 1),
+        ("q_id", 'i', questions),
+        ("q_text", 'I', questions),
+        ("q_code", 'I', questions),
+        ("q_image", 'I', questions),
+        ("q_alt", 'I', questions),
+        ("q_extra", 'I', questions),
+        ("q_options", 'I', questions + 1),
+        ("q_answers", 'Q', questions),
+        ("q_type", 'B', questions),
+        ("o_id", 'I', options),
+        ("o_text", 'I', options),
+        ("o_image", 'I', options),
+        ("o_alt", 'I', options),
+        ("o_extra", 'I', options),
+    ]
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _check_byteorder():
+    if sys.byteorder != 'little':
+        raise ValueError("le format .qstore n'est pris en charge que sur les machines little-endian")
+
+class _StringTable:
+    """Chaînes internées : texte -> index, dans l'ordre d'apparition."""
+
+    def __init__(self):
+        self.index = {}
+        self.blob = bytearray()
+        self.offsets = array('I', [0])
+
+    def add(self, text):
+        if text is None:
+            return NONE
+        position = self.index.get(text)
+        if position is None:
+            position = len(self.index)
+            self.index[text] = position
+            self.blob += text.encode('utf-8')
+            self.offsets.append(len(self.blob))
+        return position
+
+    def extra(self, item, known, fields):
+        """Champs hors colonnes d'une question ou d'une option, en JSON (ou NONE s'il n'y en a pas)."""
+        extra = {}
+        for field, (attr, _, _) in fields.items():
+            value = getattr(item, attr)
+            if field not in known and value is not None:
+                extra[field] = value
+        return self.add(json.dumps(extra, ensure_ascii=False, separators=(',', ':'))) if extra else NONE
+
+def write_store(path, title, description, questions):
+    """Écrit une banque de QuizQuestion au format .qstore (atomiquement) ; retourne le nombre de questions."""
+    _check_byteorder()
+    strings = _StringTable()
+    columns = {name: array(typecode) for name, typecode, _ in _layout(0, 0, 0)}
+    columns["q_options"].append(0)
+    title_index, description_index = strings.add(title), strings.add(description)
+
+    for question in questions:
+        options = question.options
+        if len(options) > MAX_OPTIONS:
+            raise ValueError(f"question {question.id} : plus de {MAX_OPTIONS} options")
+        # Le modèle garantit que chaque réponse est l'id d'une option
+        positions = {option.id: position for position, option in enumerate(options)}
+        mask = 0
+        for answer in question.correct_answers:
+            mask |= 1 << positions[answer]
+
+        columns["q_id"].append(question.id)
+        columns["q_text"].append(strings.add(question.question))
+        columns["q_code"].append(strings.add(question.code))
+        columns["q_image"].append(strings.add(question.image))
+        columns["q_alt"].append(strings.add(question.image_alt))
+        columns["q_extra"].append(strings.extra(question, QUESTION_FIELDS, quiz_model.QUESTION_FIELDS))
+        columns["q_answers"].append(mask)
+        columns["q_type"].append(TYPES.index(question.type))
+
+        for option in options:
+            columns["o_id"].append(strings.add(option.id))
+            columns["o_text"].append(strings.add(option.text))
+            columns["o_image"].append(strings.add(option.image))
+            columns["o_alt"].append(strings.add(option.image_alt))
+            columns["o_extra"].append(strings.extra(option, OPTION_FIELDS, quiz_model.OPTION_FIELDS))
+        columns["q_options"].append(len(columns["o_id"]))
+
+    columns["string_offsets"] = strings.offsets
+    question_count, option_count = len(columns["q_id"]), len(columns["o_id"])
+
+    with atomic_output(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, STORE_VERSION, question_count, option_count,
+                            len(strings.index), title_index, description_index))
+        for name, _, _ in _layout(question_count, option_count, len(strings.index)):
+            f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+            columns[name].tofile(f)
+        f.write(strings.blob)
+    return question_count
+
+class OptionView:
+    """Option d'une question, lue dans les colonnes du fichier."""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def id(self):
+        return self._store.string(self._store.o_id[self._index])
+
+    @property
+    def text(self):
+        return self._store.string(self._store.o_text[self._index])
+
+    @property
+    def image(self):
+        return self._store.string(self._store.o_image[self._index])
+
+    def to_dict(self):
+        store, index = self._store, self._index
+        option = {"id": self.id, "text": self.text}
+        for field, column in (("image", store.o_image), ("imageAlt", store.o_alt)):
+            if column[index] != NONE:
+                option[field] = store.string(column[index])
+        if store.o_extra[index] != NONE:
+            option.update(json.loads(store.string(store.o_extra[index])))
+        return option
+
+class QuestionView:
+    """Question du fichier ; chaque champ n'est décodé qu'à la lecture."""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def id(self):
+        return self._store.q_id[self._index]
+
+    @property
+    def type(self):
+        return TYPES[self._store.q_type[self._index]]
+
+    @property
+    def code(self):
+        return self._store.string(self._store.q_code[self._index])
+
+    @property
+    def question(self):
+        return self._store.string(self._store.q_text[self._index])
+
+    @property
+    def image(self):
+        return self._store.string(self._store.q_image[self._index])
+
+    @property
+    def option_count(self):
+        return self._store.q_options[self._index + 1] - self._store.q_options[self._index]
+
+    @property
+    def options(self):
+        start = self._store.q_options[self._index]
+        return [OptionView(self._store, start + position) for position in range(self.option_count)]
+
+    @property
+    def correct_answers(self):
+        store = self._store
+        mask, start = store.q_answers[self._index], store.q_options[self._index]
+        return [store.string(store.o_id[start + position])
+                for position in range(self.option_count) if mask >> position & 1]
+
+    def to_dict(self):
+        """Question au format JSON de l'application (src/types/quiz.ts)."""
+        store, index = self._store, self._index
+        question = {
+            "id": self.id,
+            "question": self.question,
+            "type": self.type,
+            "options": [option.to_dict() for option in self.options],
+            "correctAnswers": self.correct_answers,
+        }
+        for field, column in (("code", store.q_code), ("image", store.q_image), ("imageAlt", store.q_alt)):
+            if column[index] != NONE:
+                question[field] = store.string(column[index])
+        if store.q_extra[index] != NONE:
+            question.update(json.loads(store.string(store.q_extra[index])))
+        return question
+
+    def __repr__(self):
+        return f"QuestionView(id={self.id}, code={self.code!r})"
+
+class QuestionStore:
+    """Banque .qstore projetée en mémoire ; les colonnes sont des memoryview sans copie.
+
+    Utilisation :
+
+        with QuestionStore("src/data/questions_complete.qstore") as store:
+            print(len(store), store.count_by_type())
+            question = store[42].to_dict()
+    """
+
+    def __init__(self, path):
+        _check_byteorder()
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        try:
+            magic, version, questions, options, strings, title, description = HEADER.unpack_from(self._mmap)
+        except struct.error:
+            self.close()
+            raise ValueError(f"{path} : fichier .qstore tronqué (en-tête incomplet)") from None
+        if magic != MAGIC or version != STORE_VERSION:
+            self.close()
+            raise ValueError(f"{path} : fichier .qstore invalide ou de version {version}")
+
+        # Position de chaque colonne d'après l'en-tête ; le fichier doit les contenir toutes
+        sections = []
+        offset = HEADER.size
+        for name, typecode, length in _layout(questions, options, strings):
+            offset = _aligned(offset)
+            size = length * array(typecode).itemsize
+            sections.append((name, typecode, offset, size))
+            offset += size
+        file_size = len(self._mmap)
+        if offset > file_size:
+            self.close()
+            raise ValueError(f"{path} : fichier .qstore tronqué ({file_size} octets, au moins {offset} attendus)")
+
+        self._columns = []
+        for name, typecode, start, size in sections:
+            column = self._view[start:start + size].cast(typecode)
+            setattr(self, name, column)
+            self._columns.append(column)
+        self._blob = self._view[offset:]
+        self._code_index = None
+        if self.string_offsets[strings] > len(self._blob):
+            self.close()
+            raise ValueError(f"{path} : fichier .qstore tronqué (chaînes incomplètes)")
+
+        self.title = self.string(title)
+        self.description = self.string(description)
+
+    def string(self, index):
+        """Chaîne d'index donné (None pour un champ absent)."""
+        if index == NONE:
+            return None
+        return str(self._blob[self.string_offsets[index]:self.string_offsets[index + 1]], 'utf-8')
+
+    def __len__(self):
+        return len(self.q_id)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"question {index} hors de la banque ({len(self)} questions)")
+        return QuestionView(self, index)
+
+    def __iter__(self):
+        return (QuestionView(self, index) for index in range(len(self)))
+
+    def count_by_type(self):
+        """Nombre de questions par type, lu dans la seule colonne des types."""
+        multiple = self.q_type.tobytes().count(1)
+        return {"single": len(self) - multiple, "multiple": multiple}
+
+    def filter(self, type=None, code_prefix=None):
+        """Questions d'un type et/ou dont le code commence par un préfixe."""
+        type_value = TYPES.index(type) if type is not None else None
+        for index in range(len(self)):
+            if type_value is not None and self.q_type[index] != type_value:
+                continue
+            if code_prefix is not None and not (self.string(self.q_code[index]) or '').startswith(code_prefix):
+                continue
+            yield QuestionView(self, index)
+
+    def by_code(self, code):
+        """Question d'un code donné, ou None (seuls les codes sont décodés, au premier appel)."""
+        if self._code_index is None:
+            self._code_index = {}
+            for index, string_index in enumerate(self.q_code):
+                if string_index != NONE:
+                    self._code_index.setdefault(self.string(string_index), index)
+        index = self._code_index.get(code)
+        return QuestionView(self, index) if index is not None else None
+
+    def close(self):
+        """Libère les vues et la projection du fichier."""
+        for column in getattr(self, '_columns', []):
+            column.release()
+        for name in ('_blob', '_view'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def store_path_for(json_path):
+    """Chemin .qstore associé à un fichier de quiz JSON."""
+    return Path(json_path).with_suffix('.qstore')
+
+def main(argv=None):
+    """Construit, décrit ou exporte une banque .qstore."""
+    parser = argparse.ArgumentParser(description="Stockage binaire en colonnes de la banque de questions EPSF")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="convertir un fichier de quiz JSON en .qstore")
+    build.add_argument('input', nargs='?', default=str(DEFAULT_INPUT),
+                       help=f"fichier de quiz JSON (défaut : {DEFAULT_INPUT})")
+    build.add_argument('--output', '-o', help="fichier .qstore (défaut : même nom, extension .qstore)")
+
+    info = commands.add_parser('info', help="afficher le contenu d'un .qstore")
+    info.add_argument('store', help="fichier .qstore")
+
+    export = commands.add_parser('export', help="réécrire un .qstore en JSON pour l'application")
+    export.add_argument('store', help="fichier .qstore")
+    export.add_argument('--output', '-o', required=True, help="fichier de quiz JSON à écrire")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        quiz = load_quiz(args.input)
+        output = Path(args.output) if args.output else store_path_for(args.input)
+        count = write_store(output, quiz.title, quiz.description, quiz.questions)
+        size = output.stat().st_size
+        print(f"✅ {count} questions écrites dans {output} ({size} octets, JSON : {Path(args.input).stat().st_size})")
+        return
+
+    with QuestionStore(args.store) as store:
+        if args.command == 'info':
+            counts = store.count_by_type()
+            print(f"📄 {store.path} : {store.title}")
+            print(f"Total questions: {len(store)}")
+            print(f"Questions à choix unique: {counts['single']}")
+            print(f"Questions à choix multiple: {counts['multiple']}")
+            print(f"Chaînes internées: {len(store.string_offsets) - 1}, options: {len(store.o_id)}")
+        else:
+            count = write_quiz(args.output, store.title, (question.to_dict() for question in store),
+                               lambda _: store.description)
+            print(f"✅ {count} questions exportées dans {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modèle des questions de quiz, partagé par tous les scripts
+
+Reprend les types de src/types/quiz.ts (QuizOption, QuizQuestion, Quiz)
+sous forme de classes à __slots__ : une question ou une option n'a pas de
+dictionnaire d'attributs, les champs absents valent None. Les chaînes qui
+se répètent d'une question à l'autre (ids d'options et réponses, type,
+textes d'options, images et textes alternatifs) sont internées : une
+banque fusionnée ne garde qu'un exemplaire de chacune.
+
+Le schéma est vérifié à la construction (champs obligatoires, types,
+réponses présentes dans les options, ids d'options uniques) : une erreur
+lève QuizSchemaError à l'endroit où la question est construite, pas au
+moment de l'écrire. Les vérifications propres à une banque complète (ids
+continus, codes uniques, images présentes, au moins une réponse, type
+cohérent avec le nombre de réponses) restent dans validate_quiz.py :
+l'extraction PDF produit des questions à compléter à la main.
+
+Les champs JSON (camelCase, comme dans l'application) correspondent à des
+attributs Python (snake_case) ; ``to_dict`` les écrit dans l'ordre de
+src/types/quiz.ts, ce qui garde les fichiers produits identiques.
+
+Le module regroupe aussi ce que partagent les scripts qui comparent des
+banques (fusion, quasi-doublons) : lecture tolérante d'un fichier
+(``load_quiz_file``), développement des motifs glob (``resolve_inputs``) et
+clé des réponses correctes indépendante de l'ordre des options
+(``answer_key``).
+
+    quiz = load_quiz("src/data/questions_complete.json")
+    for question in quiz.questions:
+        print(question.id, question.code, question.correct_answers)
+    write_quiz(path, quiz.title, quiz.questions, quiz.description)
+"""
+
+import glob
+import json
+import re
+import unicodedata
+from pathlib import Path
+from sys import intern
+
+QUESTION_TYPES = ("single", "multiple")
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Ponctuation ignorée à la comparaison (virgule ou point final d'une option...)
+PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+
+# Champs de src/types/quiz.ts : clé JSON -> (attribut, obligatoire, type),
+# dans l'ordre où ils sont écrits
+OPTION_FIELDS = {
+    "id": ("id", True, str),
+    "text": ("text", True, str),
+    "image": ("image", False, str),
+    "imageAlt": ("image_alt", False, str),
+    "imageWidth": ("image_width", False, int),
+    "imageHeight": ("image_height", False, int),
+    "imagePlaceholder": ("image_placeholder", False, str),
+    "imageSrcSet": ("image_srcset", False, dict),
+}
+QUESTION_FIELDS = {
+    "id": ("id", True, int),
+    "question": ("question", True, str),
+    "type": ("type", True, str),
+    "options": ("options", True, list),
+    "correctAnswers": ("correct_answers", True, list),
+    "code": ("code", False, str),
+    "image": ("image", False, str),
+    "imageAlt": ("image_alt", False, str),
+    "imageWidth": ("image_width", False, int),
+    "imageHeight": ("image_height", False, int),
+    "imagePlaceholder": ("image_placeholder", False, str),
+    "imageSrcSet": ("image_srcset", False, dict),
+    "sourceId": ("source_id", False, int),
+    # number en TypeScript : un entier (0, 1) est une difficulté valide
+    "difficulty": ("difficulty", False, (int, float)),
+}
+
+# Champs facultatifs (clé JSON, attribut), écrits par to_dict s'ils sont renseignés
+_OPTION_OPTIONAL = tuple((key, attr) for key, (attr, required, _) in OPTION_FIELDS.items() if not required)
+_QUESTION_OPTIONAL = tuple((key, attr) for key, (attr, required, _) in QUESTION_FIELDS.items() if not required)
+_OPTION_ATTRS = {key: attr for key, (attr, _, _) in OPTION_FIELDS.items()}
+_QUESTION_ATTRS = {key: attr for key, (attr, _, _) in QUESTION_FIELDS.items()}
+
+class QuizSchemaError(ValueError):
+    """Question ou option qui ne respecte pas le schéma de src/types/quiz.ts."""
+
+def type_name(expected):
+    """Nom d'un type attendu (ou d'un tuple de types) pour les messages d'erreur."""
+    if isinstance(expected, tuple):
+        return " ou ".join(kind.__name__ for kind in expected)
+    return expected.__name__
+
+def _describe(item):
+    """Option ou question en cours de construction (ou libellé), pour situer une erreur."""
+    if isinstance(item, str):
+        return item
+    if isinstance(item, QuizOption):
+        # L'id n'est affecté qu'une fois vérifié
+        return f"option {item.id!r}" if hasattr(item, 'id') else "option"
+    code = getattr(item, 'code', None)
+    return f"question {item.id!r} ({code})" if isinstance(code, str) else f"question {item.id!r}"
+
+def _check(value, expected, key, item):
+    """Retourne `value` si elle est du type attendu, lève QuizSchemaError sinon.
+
+    L'emplacement de l'erreur n'est mis en forme qu'en cas d'échec.
+    """
+    # bool est un sous-type d'int : un id à true n'est pas un id valide
+    if not isinstance(value, expected) or isinstance(value, bool):
+        raise QuizSchemaError(f"{_describe(item)}: '{key}' doit être de type {type_name(expected)}")
+    return value
+
+def _check_keys(data, fields, where):
+    """Lève QuizSchemaError si un objet JSON n'est pas un objet ou a un champ manquant ou inconnu."""
+    if not isinstance(data, dict):
+        raise QuizSchemaError(f"{where}: objet attendu")
+    for key, (_, required, _) in fields.items():
+        if required and key not in data:
+            raise QuizSchemaError(f"{where}: champ '{key}' manquant")
+    for key in data:
+        if key not in fields:
+            raise QuizSchemaError(f"{where}: champ '{key}' inconnu")
+
+def _to_dict(item, data, optional):
+    """Complète un objet JSON avec les champs facultatifs renseignés."""
+    for key, attr in optional:
+        value = getattr(item, attr)
+        if value is not None:
+            data[key] = value
+    return data
+
+class QuizOption:
+    """Option d'une question (QuizOption)."""
+
+    __slots__ = tuple(attr for attr, _, _ in OPTION_FIELDS.values())
+
+    def __init__(self, id, text, image=None, image_alt=None, image_width=None, image_height=None,
+                 image_placeholder=None, image_srcset=None):
+        self.id = intern(_check(id, str, "id", self))
+        self.text = intern(_check(text, str, "text", self))
+        self.image = image if image is None else intern(_check(image, str, "image", self))
+        self.image_alt = image_alt if image_alt is None else intern(_check(image_alt, str, "imageAlt", self))
+        self.image_width = image_width if image_width is None else _check(image_width, int, "imageWidth", self)
+        self.image_height = (image_height if image_height is None
+                             else _check(image_height, int, "imageHeight", self))
+        self.image_placeholder = (image_placeholder if image_placeholder is None
+                                  else _check(image_placeholder, str, "imagePlaceholder", self))
+        self.image_srcset = (image_srcset if image_srcset is None
+                             else _check(image_srcset, dict, "imageSrcSet", self))
+
+    @classmethod
+    def from_dict(cls, data, where="option"):
+        """Option d'après son objet JSON."""
+        try:
+            return cls(**{_OPTION_ATTRS[key]: value for key, value in data.items()})
+        except (KeyError, TypeError, AttributeError):
+            _check_keys(data, OPTION_FIELDS, where)
+            raise
+
+    def to_dict(self):
+        """Objet JSON de l'option, champs dans l'ordre de src/types/quiz.ts."""
+        return _to_dict(self, {"id": self.id, "text": self.text}, _OPTION_OPTIONAL)
+
+    def replace(self, **changes):
+        """Copie de l'option avec les champs donnés changés (vérifiés)."""
+        fields = {attr: getattr(self, attr) for attr in self.__slots__}
+        fields.update(changes)
+        return QuizOption(**fields)
+
+    def __eq__(self, other):
+        if not isinstance(other, QuizOption):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    def __repr__(self):
+        return f"QuizOption(id={self.id!r}, text={self.text!r})"
+
+class QuizQuestion:
+    """Question de quiz (QuizQuestion) ; ``options`` est une liste de QuizOption."""
+
+    __slots__ = tuple(attr for attr, _, _ in QUESTION_FIELDS.values())
+
+    def __init__(self, id, question, type, options, correct_answers, code=None, image=None, image_alt=None,
+                 image_width=None, image_height=None, image_placeholder=None, image_srcset=None,
+                 source_id=None, difficulty=None):
+        self.id = id
+        self.code = code
+        _check(id, int, "id", self)
+        self.code = code if code is None else _check(code, str, "code", self)
+        self.question = _check(question, str, "question", self)
+        if type not in QUESTION_TYPES:
+            raise QuizSchemaError(f"{_describe(self)}: type '{type}' inconnu")
+        self.type = intern(type)
+
+        option_ids = {}
+        for option in _check(options, list, "options", self):
+            if not isinstance(option, QuizOption):
+                raise QuizSchemaError(f"{_describe(self)}: {option!r} n'est pas une QuizOption")
+            if option.id in option_ids:
+                raise QuizSchemaError(f"{_describe(self)}: id d'option '{option.id}' dupliqué")
+            option_ids[option.id] = option.id
+        self.options = options
+
+        # Réponses : ids d'options existants, partagés avec les options (internés)
+        answers = []
+        for answer in _check(correct_answers, list, "correctAnswers", self):
+            if not isinstance(answer, str) or answer not in option_ids:
+                raise QuizSchemaError(f"{_describe(self)}: réponse {answer!r} absente des options")
+            answers.append(option_ids[answer])
+        self.correct_answers = answers
+
+        self.image = image if image is None else intern(_check(image, str, "image", self))
+        self.image_alt = image_alt if image_alt is None else intern(_check(image_alt, str, "imageAlt", self))
+        self.image_width = image_width if image_width is None else _check(image_width, int, "imageWidth", self)
+        self.image_height = (image_height if image_height is None
+                             else _check(image_height, int, "imageHeight", self))
+        self.image_placeholder = (image_placeholder if image_placeholder is None
+                                  else _check(image_placeholder, str, "imagePlaceholder", self))
+        self.image_srcset = (image_srcset if image_srcset is None
+                             else _check(image_srcset, dict, "imageSrcSet", self))
+        self.source_id = source_id if source_id is None else _check(source_id, int, "sourceId", self)
+        self.difficulty = (difficulty if difficulty is None
+                           else _check(difficulty, (int, float), "difficulty", self))
+
+    @classmethod
+    def from_dict(cls, data, where="question"):
+        """Question d'après son objet JSON (options comprises)."""
+        try:
+            fields = {_QUESTION_ATTRS[key]: value for key, value in data.items()}
+            options = fields["options"]
+        except (KeyError, AttributeError):
+            _check_keys(data, QUESTION_FIELDS, where)
+            raise
+        try:
+            fields["options"] = [QuizOption.from_dict(option) for option in options]
+        except TypeError:
+            raise QuizSchemaError(f"{where}: 'options' doit être de type list") from None
+        except QuizSchemaError as e:
+            raise QuizSchemaError(f"question {data.get('id')!r}, {e}") from None
+        try:
+            return cls(**fields)
+        except TypeError:
+            _check_keys(data, QUESTION_FIELDS, where)
+            raise
+
+    def to_dict(self):
+        """Objet JSON de la question, champs dans l'ordre de src/types/quiz.ts."""
+        return _to_dict(self, {
+            "id": self.id,
+            "question": self.question,
+            "type": self.type,
+            "options": [option.to_dict() for option in self.options],
+            "correctAnswers": list(self.correct_answers),
+        }, _QUESTION_OPTIONAL)
+
+    def replace(self, **changes):
+        """Copie de la question avec les champs donnés changés (vérifiés).
+
+        Les options sont partagées avec l'original, sauf si ``options`` est
+        donné : les modifier en place modifie les deux questions.
+        """
+        fields = {attr: getattr(self, attr) for attr in self.__slots__}
+        fields["options"] = list(self.options)
+        fields.update(changes)
+        return QuizQuestion(**fields)
+
+    def option(self, option_id):
+        """Option d'id donné, ou None."""
+        for option in self.options:
+            if option.id == option_id:
+                return option
+        return None
+
+    def __eq__(self, other):
+        if not isinstance(other, QuizQuestion):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    def __repr__(self):
+        return f"QuizQuestion(id={self.id}, code={self.code!r})"
+
+class Quiz:
+    """Fichier de quiz (QuizData) : titre, description et questions."""
+
+    __slots__ = ('title', 'description', 'questions')
+
+    def __init__(self, title, description, questions):
+        self.title = _check(title, str, "title", "quiz")
+        self.description = _check(description, str, "description", "quiz")
+        self.questions = questions
+
+    @classmethod
+    def from_dict(cls, data, where="quiz"):
+        """Quiz d'après un objet {"quiz": {...}} ; l'erreur indique la question fautive."""
+        quiz = data.get("quiz") if isinstance(data, dict) else None
+        questions = quiz.get("questions") if isinstance(quiz, dict) else None
+        if not isinstance(questions, list):
+            raise QuizSchemaError(f"{where}: structure invalide, quiz.questions manquant")
+        try:
+            return cls(quiz.get("title"), quiz.get("description"),
+                       [QuizQuestion.from_dict(question, f"question #{index}")
+                        for index, question in enumerate(questions, 1)])
+        except QuizSchemaError as e:
+            raise QuizSchemaError(f"{where}, {e}") from None
+
+    def to_dict(self):
+        """Objet JSON du fichier de quiz."""
+        return {"quiz": {"title": self.title, "description": self.description,
+                         "questions": [question.to_dict() for question in self.questions]}}
+
+def load_quiz(path):
+    """Lit un fichier de quiz JSON ; lève OSError, ValueError ou QuizSchemaError."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return Quiz.from_dict(data, str(path))
+
+def as_question(question):
+    """QuizQuestion d'après une question ou son objet JSON (vérifié)."""
+    return question if isinstance(question, QuizQuestion) else QuizQuestion.from_dict(question)
+
+def load_quiz_file(filepath):
+    """Charge un fichier de quiz (Quiz) ; None s'il est illisible ou ne respecte pas le schéma"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Erreur lors du chargement de {filepath}: {e}")
+        return None
+    try:
+        return Quiz.from_dict(data, Path(filepath).name)
+    except QuizSchemaError as e:
+        print(f"Structure invalide dans {e}")
+        return None
+
+def resolve_inputs(patterns, output_file=None):
+    """Développe les chemins et motifs glob donnés, sans doublon ni fichier de sortie."""
+    output = Path(output_file).resolve() if output_file else None
+    files = []
+    seen = set()
+
+    for pattern in patterns:
+        pattern = str(pattern)
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            resolved = Path(match).resolve()
+            if resolved in seen or resolved == output:
+                continue
+            seen.add(resolved)
+            files.append(Path(match))
+
+    return files
+
+def normalize_text(text):
+    """Normalise un texte pour la comparaison (casse, apostrophes, espaces, ponctuation)."""
+    text = unicodedata.normalize('NFKC', text or '').replace('’', "'").casefold()
+    text = PUNCTUATION_PATTERN.sub(' ', text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+def answer_key(question):
+    """Réponses correctes exprimées par le texte normalisé des options.
+
+    Deux copies d'une même question dont les options sont dans un ordre
+    différent ont ainsi la même clé.
+    """
+    texts = {option.id: normalize_text(option.text) for option in question.options}
+    return tuple(sorted(texts[answer] for answer in question.correct_answers))
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Écriture en flux des fichiers de quiz ({"quiz": {...}}).
+
+Les questions sont écrites une à une dans le tableau quiz.questions au fur
+et à mesure qu'elles arrivent ; la description (qui contient le nombre de
+questions) est complétée à la fin. Le fichier produit est identique à un
+json.dump(..., ensure_ascii=False, indent=2) de la structure complète.
+
+Toutes les écritures passent par un fichier temporaire renommé à la fin :
+un arrêt brutal ne laisse jamais un fichier de quiz tronqué.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from quiz_model import as_question
+
+DESCRIPTION_TEMPLATE = "Testez vos connaissances avec ce quiz interactif pour la licence EPSF - {count} questions"
+
+# Indentation des questions dans le tableau quiz.questions
+QUESTION_INDENT = ' ' * 6
+
+# Taille de l'en-tête et de la fin de fichier lues lors d'un ajout
+HEAD_SIZE = 64 * 1024
+TAIL_SIZE = 4 * 1024
+
+DESCRIPTION_PATTERN = re.compile(rb'"description": ("(?:[^"\\]|\\.)*")')
+QUESTIONS_PATTERN = re.compile(rb'"questions": \[(?:\]|\n' + QUESTION_INDENT.encode('ascii') + rb'\{\n)')
+# Ligne d'ouverture d'une question dans le tableau quiz.questions
+QUESTION_START = b'\n' + QUESTION_INDENT.encode('ascii') + b'{\n'
+
+
+def quiz_description(count):
+    """Description standard d'un quiz de `count` questions."""
+    return DESCRIPTION_TEMPLATE.format(count=count)
+
+
+def format_question(question):
+    """Sérialise une question (QuizQuestion, ou objet JSON vérifié) telle qu'elle apparaît dans quiz.questions."""
+    text = json.dumps(as_question(question).to_dict(), ensure_ascii=False, indent=2)
+    return '\n'.join(QUESTION_INDENT + line for line in text.split('\n'))
+
+
+def _temp_path(path):
+    """Crée un fichier temporaire vide dans le répertoire de `path`."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    os.close(fd)
+    return Path(tmp)
+
+
+def _commit(tmp_path, path):
+    """Remplace atomiquement `path` par `tmp_path`.
+
+    Le fichier garde les droits de celui qu'il remplace (ou les droits par
+    défaut), mkstemp créant ses fichiers en 0600.
+    """
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(tmp_path, mode)
+
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def atomic_output(path, mode='w'):
+    """Ouvre en écriture un fichier qui ne remplace `path` qu'à la sortie du bloc sans erreur.
+
+    Le contenu est écrit dans un fichier temporaire du même répertoire, puis
+    renommé atomiquement ; en cas d'exception, `path` reste intact.
+    """
+    path = Path(path)
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+        _commit(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+class QuizWriter:
+    """Écrit un fichier de quiz question par question.
+
+    Utilisation :
+
+        with QuizWriter("src/data/questions.json", "Quiz de Révision EPSF") as writer:
+            for question in questions:
+                writer.write(question)
+
+    Le fichier final n'apparaît (atomiquement) qu'à la sortie du bloc sans
+    erreur ; en cas d'exception, le fichier existant reste intact.
+    """
+
+    def __init__(self, path, title, description=quiz_description):
+        self.path = Path(path)
+        self.title = title
+        # Chaîne fixe ou fonction du nombre de questions
+        self.description = description
+        self.count = 0
+        self._body = None
+        self._body_path = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._body_path = _temp_path(self.path)
+        self._body = open(self._body_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, question):
+        """Ajoute une question à la fin du tableau."""
+        self._body.write(('\n' if self.count == 0 else ',\n') + format_question(question))
+        self.count += 1
+
+    def write_all(self, questions):
+        """Ajoute toutes les questions d'un itérable ; retourne leur nombre."""
+        start = self.count
+        for question in questions:
+            self.write(question)
+        return self.count - start
+
+    def __exit__(self, exc_type, exc, tb):
+        self._body.close()
+        try:
+            if exc_type is None:
+                self._finish()
+        finally:
+            if self._body_path.exists():
+                self._body_path.unlink()
+        return False
+
+    def _finish(self):
+        description = self.description(self.count) if callable(self.description) else self.description
+        head = (
+            '{\n  "quiz": {\n'
+            f'    "title": {json.dumps(self.title, ensure_ascii=False)},\n'
+            f'    "description": {json.dumps(description, ensure_ascii=False)},\n'
+            '    "questions": ['
+        )
+        tail = '\n    ]\n  }\n}' if self.count else ']\n  }\n}'
+
+        with atomic_output(self.path) as out:
+            out.write(head)
+            with open(self._body_path, 'r', encoding='utf-8') as body:
+                shutil.copyfileobj(body, out)
+            out.write(tail)
+
+
+def write_quiz(path, title, questions, description=quiz_description):
+    """Écrit un fichier de quiz complet à partir d'un itérable de questions.
+
+    Retourne le nombre de questions écrites.
+    """
+    with QuizWriter(path, title, description) as writer:
+        writer.write_all(questions)
+    return writer.count
+
+
+def append_questions(path, questions, description=quiz_description):
+    """Ajoute des questions à la fin d'un fichier de quiz existant.
+
+    Le fichier n'est pas rechargé : seuls l'en-tête (description) et la fin
+    du tableau quiz.questions sont analysés, le reste est recopié tel quel.
+    Le nombre de questions existantes est compté dans le tableau (et non lu
+    dans la description, qui peut être périmée). Si la mise en page n'est pas
+    celle attendue (json.dump indenté, questions en dernière clé), on se
+    rabat sur un chargement complet. Retourne (questions ajoutées, total).
+    """
+    path = Path(path)
+    size = path.stat().st_size
+
+    with open(path, 'rb') as f:
+        head = f.read(HEAD_SIZE)
+        f.seek(max(0, size - TAIL_SIZE))
+        tail_start = f.tell()
+        tail = f.read()
+
+    layout = _append_layout(head, tail, tail_start)
+    if layout is None:
+        return _append_by_rewrite(path, questions, description)
+    description_start, description_end, content_end, close_offset, empty = layout
+    existing = 0 if empty else _count_questions(path)
+
+    # Les nouvelles questions sont d'abord écrites à part : le total (dans
+    # la description, en tête de fichier) n'est connu qu'à la fin
+    body_path = _temp_path(path)
+    added = 0
+    try:
+        with open(body_path, 'w', encoding='utf-8') as body:
+            for question in questions:
+                body.write(('\n' if empty and added == 0 else ',\n') + format_question(question))
+                added += 1
+
+        total = existing + added
+        new_description = description(total) if callable(description) else description
+
+        # src est refermé avant le renommage
+        with atomic_output(path, 'wb') as out, open(path, 'rb') as src:
+            out.write(head[:description_start])
+            out.write(json.dumps(new_description, ensure_ascii=False).encode('utf-8'))
+            src.seek(description_end)
+            if added:
+                _copy_range(src, out, content_end - description_end)
+                with open(body_path, 'rb') as body:
+                    shutil.copyfileobj(body, out)
+                out.write(b'\n    ]')
+                src.seek(close_offset + 1)
+            shutil.copyfileobj(src, out)
+    finally:
+        if body_path.exists():
+            body_path.unlink()
+
+    return added, total
+
+
+def _append_layout(head, tail, tail_start):
+    """Repère dans l'en-tête et la fin d'un fichier les positions utiles à un ajout.
+
+    Retourne (début et fin de la valeur de description, fin du dernier
+    élément, position du "]" final, tableau vide) ou None si le fichier n'a
+    pas la forme attendue.
+    """
+    match = DESCRIPTION_PATTERN.search(head)
+    if not match or not QUESTIONS_PATTERN.search(head, match.end()):
+        return None
+
+    close = tail.rfind(b']')
+    if close < 0 or tail[close + 1:].strip(b' \t\r\n}'):
+        return None
+    content = tail[:close].rstrip(b' \t\r\n')
+    # Le dernier élément doit être une question fermée au niveau de QUESTION_INDENT
+    if not content or not content.endswith((b'[', QUESTION_START[:-2] + b'}')):
+        return None
+
+    return (match.start(1), match.end(1),
+            tail_start + len(content), tail_start + close, content.endswith(b'['))
+
+
+def _count_questions(path, chunk_size=1024 * 1024):
+    """Compte les questions du tableau quiz.questions sans décoder le fichier.
+
+    Dans un json.dump indenté, seules les questions ouvrent un objet seul sur
+    sa ligne au niveau de QUESTION_INDENT (les retours à la ligne des chaînes
+    sont échappés) : il suffit de compter ces lignes.
+    """
+    overlap = len(QUESTION_START) - 1
+    count = 0
+    carry = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            data = carry + chunk
+            count += data.count(QUESTION_START)
+            # Une ligne d'ouverture peut chevaucher deux blocs
+            carry = data[-overlap:]
+    return count
+
+
+def _copy_range(src, out, length, chunk_size=1024 * 1024):
+    """Recopie `length` octets de `src` vers `out`."""
+    while length > 0:
+        chunk = src.read(min(chunk_size, length))
+        if not chunk:
+            break
+        out.write(chunk)
+        length -= len(chunk)
+
+
+def _append_by_rewrite(path, questions, description):
+    """Ajout par chargement complet, pour les fichiers à la mise en page inattendue."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    existing = data['quiz']['questions']
+    before = len(existing)
+    existing.extend(as_question(question).to_dict() for question in questions)
+    total = len(existing)
+    data['quiz']['description'] = description(total) if callable(description) else description
+
+    with atomic_output(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+    return total - before, total
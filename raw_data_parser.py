@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser en flux des fichiers raw_data*.txt.
+
+Format d'un bloc (les blocs sont séparés par ////////) :
+
+    Texte de la question
+    []Option 1,
+    []Option 2, XXX        <- bonne réponse
+    []Option 3.
+    CODE 12
+
+Le fichier est projeté en mémoire (mmap) : les séparateurs sont cherchés
+sur les octets par un motif compilé, en une passe sur tout le fichier, et
+seul le texte de chaque bloc est décodé, au moment où il est analysé (le
+fichier n'est jamais décodé ni chargé d'un bloc). L'encodage est déduit de
+la marque d'ordre des octets (BOM UTF-8 ou UTF-16) ; sans BOM, le fichier
+est lu en UTF-8, avec repli sur cp1252 au premier bloc invalide. Chaque question est
+produite dès que son bloc est terminé ; les blocs ignorés sont signalés avec
+leur numéro de ligne et la raison du rejet, rien n'est perdu en silence.
+L'entrée standard ('-', plusieurs banques concaténées) ne peut pas être
+projetée : elle est lue par morceaux, et les séparateurs y sont cherchés au
+fur et à mesure de l'arrivée des données (seul le bloc en cours est gardé en
+mémoire).
+"""
+
+import argparse
+import codecs
+import itertools
+import json
+import mmap
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+import instrumentation
+from quiz_model import QuizOption, QuizQuestion
+from quiz_writer import write_quiz
+
+# Séparateur de blocs : au moins 8 barres obliques, n'importe où dans une ligne
+# (écrit avec un préfixe littéral, que le moteur re cherche bien plus vite que /{8,})
+SEPARATOR_PATTERN = re.compile(rb'////////+')
+# Marqueur d'option en début de ligne (« [] », « [ ] ») et suffixe de bonne réponse
+OPTION_PATTERN = re.compile(r'\[[ \t]*\]')
+CORRECT_SUFFIXES = (' XXX', '\tXXX')
+
+# Marques d'ordre des octets reconnues
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+DEFAULT_ENCODING = 'utf-8'
+# Encodage supposé d'un fichier sans BOM qui n'est pas de l'UTF-8 valide
+FALLBACK_ENCODING = 'cp1252'
+
+# Longueur de l'extrait de texte donné pour un bloc ignoré
+SKIPPED_PREVIEW = 80
+
+# Taille maximale d'une lecture sur l'entrée standard
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def detect_encoding(buffer):
+    """Encodage d'un tampon d'après sa BOM : (encodage, taille de la BOM)."""
+    head = bytes(buffer[:4])
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+    return DEFAULT_ENCODING, 0
+
+
+def iter_blocks(buffer, pos=0):
+    """Découpe un tampon d'octets en blocs : (numéro de la première ligne, octets du bloc).
+
+    Les séparateurs sont cherchés en une seule passe sur tout le tampon, sans
+    décoder ni découper le fichier en lignes. Le séparateur peut apparaître
+    n'importe où dans une ligne (y compris suivi d'espaces) : ce qui précède
+    termine le bloc courant, ce qui suit commence le suivant. Les blocs vides
+    ne sont pas produits.
+    """
+    line_number = 1
+    for separator in SEPARATOR_PATTERN.finditer(buffer, pos):
+        chunk = buffer[pos:separator.start()]
+        if chunk and not chunk.isspace():
+            yield line_number, chunk
+        line_number += chunk.count(b'\n')
+        pos = separator.end()
+    chunk = buffer[pos:]
+    if chunk and not chunk.isspace():
+        yield line_number, chunk
+
+
+def iter_stream_chunks(stream, chunk_size=STREAM_CHUNK_SIZE):
+    """Lit un flux d'octets par morceaux, en UTF-8 sans BOM.
+
+    Les morceaux sont rendus dès qu'ils arrivent (read1). La BOM est
+    retirée ; un flux UTF-16 est transcodé en UTF-8 au fil de la lecture.
+    """
+    head = b''
+    while len(head) < 4:
+        data = stream.read1(chunk_size)
+        if not data:
+            break
+        head += data
+    encoding, bom = detect_encoding(head)
+    chunks = itertools.chain([head[bom:]], iter(lambda: stream.read1(chunk_size), b''))
+    if encoding == DEFAULT_ENCODING:
+        yield from chunks
+        return
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for data in chunks:
+        yield decoder.decode(data).encode(DEFAULT_ENCODING)
+    yield decoder.decode(b'', final=True).encode(DEFAULT_ENCODING)
+
+
+def iter_stream_blocks(chunks):
+    """Comme iter_blocks, sur des morceaux d'octets successifs.
+
+    Seul le bloc en cours est gardé. Un séparateur qui touche la fin des
+    données reçues peut encore s'allonger : il n'est traité qu'au morceau
+    suivant.
+    """
+    line_number = 1
+    pending = b''
+    for data in chunks:
+        # Les données déjà examinées ne contiennent aucun séparateur, sauf
+        # peut-être une suite de barres obliques finale
+        scan = len(pending.rstrip(b'/'))
+        pending += data
+        pos = 0
+        for separator in SEPARATOR_PATTERN.finditer(pending, scan):
+            if separator.end() == len(pending):
+                break
+            chunk = pending[pos:separator.start()]
+            if chunk and not chunk.isspace():
+                yield line_number, chunk
+            line_number += chunk.count(b'\n')
+            pos = separator.end()
+        pending = pending[pos:]
+    for number, chunk in iter_blocks(pending):
+        yield line_number + number - 1, chunk
+
+
+def parse_block(text, question_id):
+    """Construit une question à partir du texte d'un bloc.
+
+    Les lignes avant la première option forment l'énoncé, la première ligne
+    après les options est le code ; les lignes suivantes sont ignorées.
+    Retourne (QuizQuestion, None), ou (None, raison) si le bloc est incomplet.
+    """
+    question_parts = []
+    options = []
+    correct_answers = []
+    code = ""
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('[]'):
+            option_text = line[2:].strip()
+        elif line.startswith('[') and OPTION_PATTERN.match(line):  # « [ ] »
+            option_text = line[OPTION_PATTERN.match(line).end():].strip()
+        elif not options:
+            question_parts.append(line)
+            continue
+        elif line.startswith('//'):  # séparateur incomplet
+            continue
+        else:
+            code = line
+            break
+
+        option_id = str(len(options) + 1)
+        # Bonne réponse : l'option se termine par XXX, précédé d'un blanc
+        if option_text.endswith(CORRECT_SUFFIXES):
+            option_text = option_text[:-3].strip()
+            correct_answers.append(option_id)
+        options.append(QuizOption(option_id, option_text))
+
+    if not question_parts:
+        return None, "énoncé manquant"
+    if not options:
+        return None, "aucune option"
+    if not correct_answers:
+        return None, "aucune bonne réponse (XXX)"
+    if not code:
+        return None, "code manquant"
+
+    return QuizQuestion(question_id, " ".join(question_parts), "multiple" if len(correct_answers) > 1 else "single",
+                        options, correct_answers, code), None
+
+
+def skipped_entry(source, line_number, text, reason):
+    """Description d'un bloc ignoré : fichier, ligne de son premier texte, raison, extrait."""
+    lines = text.split('\n')
+    # Bloc fait de blancs non ASCII (espaces insécables...) : première ligne du bloc
+    first = next((index for index, line in enumerate(lines) if line.strip()), 0)
+    return {"file": source, "line": line_number + first, "reason": reason,
+            "text": lines[first].strip()[:SKIPPED_PREVIEW]}
+
+
+def iter_questions(buffer, start_id=1, source=None, skipped=None):
+    """Produit les questions (QuizQuestion) d'un tampon d'octets, au fil de la lecture.
+
+    Les ids sont attribués à la suite à partir de ``start_id``, en ne
+    comptant que les blocs valides. Les blocs ignorés sont ajoutés à la liste
+    ``skipped`` (fichier, ligne, raison, extrait).
+    """
+    encoding, pos = detect_encoding(buffer)
+    if encoding != DEFAULT_ENCODING:
+        # UTF-16 : transcodé une fois pour que les motifs sur les octets s'appliquent
+        buffer, pos = str(buffer[pos:], encoding).encode(DEFAULT_ENCODING), 0
+
+    yield from parse_blocks(iter_blocks(buffer, pos), start_id, source, skipped)
+
+
+def iter_stream_questions(stream, start_id=1, source='stdin', skipped=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Comme iter_questions, sur un flux d'octets lu par morceaux (entrée standard)."""
+    yield from parse_blocks(iter_stream_blocks(iter_stream_chunks(stream, chunk_size)), start_id, source, skipped)
+
+
+def parse_blocks(blocks, start_id=1, source=None, skipped=None):
+    """Produit les questions d'une suite de blocs (numéro de ligne, octets du bloc, sans BOM).
+
+    Un bloc qui n'est pas de l'UTF-8 valide fait passer la suite en cp1252.
+    """
+    encoding = DEFAULT_ENCODING
+    question_id = start_id
+    errors = 'strict'
+    for line_number, chunk in blocks:
+        instrumentation.count("raw.blocks")
+        try:
+            text = chunk.decode(encoding, errors)
+        except UnicodeDecodeError:
+            # Sans BOM et pas de l'UTF-8 : la suite du fichier est lue en cp1252
+            # (les blocs déjà lus restent justes, l'ASCII s'écrit de la même façon)
+            print(f"⚠️  {source or 'entrée'} n'est pas en UTF-8 : lecture en {FALLBACK_ENCODING}", file=sys.stderr)
+            instrumentation.count("raw.fallback_encoding")
+            encoding, errors = FALLBACK_ENCODING, 'replace'
+            text = chunk.decode(encoding, errors)
+
+        question, reason = parse_block(text, question_id)
+        if question is not None:
+            instrumentation.count("raw.questions")
+            yield question
+            question_id += 1
+            continue
+
+        instrumentation.count("raw.skipped")
+        if skipped is not None:
+            skipped.append(skipped_entry(source, line_number, text, reason))
+
+
+@contextmanager
+def open_buffer(path):
+    """Tampon d'octets d'un fichier raw_data, projeté en mémoire."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap refuse les fichiers vides
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def iter_file_questions(path, start_id=1, skipped=None):
+    """Produit les questions d'un fichier raw_data (ou de stdin avec '-')."""
+    instrumentation.count("raw.files")
+    if path == '-':
+        yield from iter_stream_questions(sys.stdin.buffer, start_id, 'stdin', skipped)
+        return
+    with open_buffer(path) as buffer:
+        yield from iter_questions(buffer, start_id, str(path), skipped)
+
+
+def iter_inputs_questions(paths, start_id=1, skipped=None):
+    """Enchaîne les questions de plusieurs fichiers, avec des ids continus."""
+    question_id = start_id
+    for path in paths:
+        for question in iter_file_questions(path, question_id, skipped):
+            yield question
+            question_id = question.id + 1
+
+
+def report_skipped(skipped, report_path=None):
+    """Signale les blocs ignorés sur stderr et, au besoin, dans un rapport JSON."""
+    if skipped:
+        print(f"⚠️  {len(skipped)} blocs ignorés :", file=sys.stderr)
+        for entry in skipped:
+            print(f"   {entry['file']}:{entry['line']} : {entry['reason']} — {entry['text']}", file=sys.stderr)
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(skipped, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    """Écrit les questions des fichiers donnés dans un quiz JSON ou sur stdout.
+
+    Sans --output, une question JSON par ligne est écrite sur stdout.
+    """
+    parser = argparse.ArgumentParser(description="Parser en flux des fichiers raw_data*.txt")
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help="fichiers raw_data à lire ('-' pour stdin, par défaut)")
+    parser.add_argument('--start-id', type=int, default=1,
+                        help="id de la première question (défaut : 1)")
+    parser.add_argument('--output', '-o',
+                        help="fichier de quiz JSON à écrire (en flux, atomiquement)")
+    parser.add_argument('--title', default="Quiz de Révision EPSF",
+                        help="titre du quiz écrit avec --output")
+    parser.add_argument('--skipped-report', metavar='FICHIER',
+                        help="fichier JSON où lister les blocs ignorés (fichier, ligne, raison)")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    skipped = []
+    with instrumentation.session(args), instrumentation.stage("raw.run"):
+        questions = iter_inputs_questions(args.inputs, args.start_id, skipped)
+
+        if args.output:
+            count = write_quiz(args.output, args.title, questions)
+            print(f"Créé le fichier {args.output} avec {count} questions", file=sys.stderr)
+        else:
+            for question in questions:
+                sys.stdout.write(json.dumps(question.to_dict(), ensure_ascii=False) + '\n')
+
+    report_skipped(skipped, args.skipped_report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index de recherche plein texte sur la banque de questions
+
+Un index inversé est construit sur le texte des questions, des options et
+sur le code, après normalisation adaptée au français (accents, apostrophes
+typographiques, casse, élisions, pluriels simples). Les résultats sont
+classés par score BM25.
+
+L'index est sérialisé en JSON minifié à côté des paquets exportés, sous un
+nom haché référencé par le manifeste (voir export_bundles.py) ; les numéros
+de documents des listes de postings sont codés en écarts pour rester
+compacts. La détection des quasi-doublons passe par near_duplicates.py.
+
+Utilisation :
+    python search_index.py "aiguille talonnée"
+    python search_index.py "RSP 15" --limit 3 --json
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+from quiz_model import load_quiz
+
+DEFAULT_INPUT = Path("src/data/questions_complete.json")
+DEFAULT_BUNDLE_DIR = Path("public/quiz")
+INDEX_VERSION = 1
+
+# Suites de lettres ou de chiffres : « l'aiguille » -> l, aiguille ; « RSP15bis » -> rsp, 15, bis
+TOKEN_PATTERN = re.compile(r'[a-z]+|[0-9]+')
+
+# Mots vides : trop fréquents pour départager les questions
+STOPWORDS = frozenset("""
+    au aux avec ce ces cet cette dans de des du elle en est et il ils je la le les leur lui
+    ne ni nous on ou par pas pour qu que qui sa se ses son sont sur ta te tes ton tu un une
+    vos votre vous etre avoir ete
+""".split())
+
+# Paramètres BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def normalize_term(token):
+    """Réduit un mot à sa forme indexée (pluriel simple en -s / -x retiré)."""
+    if len(token) > 3 and token[-1] in 'sx' and not token.isdigit():
+        return token[:-1]
+    return token
+
+class _FoldTable(dict):
+    """Table pour str.translate : caractère -> forme sans accent ni casse, calculée une fois."""
+
+    def __missing__(self, code):
+        decomposed = unicodedata.normalize('NFKD', chr(code))
+        folded = ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+        self[code] = folded
+        return folded
+
+# Ligatures sans décomposition Unicode
+FOLD_TABLE = _FoldTable({ord('œ'): 'oe', ord('Œ'): 'oe', ord('æ'): 'ae', ord('Æ'): 'ae'})
+
+def tokenize(text):
+    """Termes indexés d'un texte : sans accents ni casse, sans mots vides."""
+    text = (text or '').translate(FOLD_TABLE)
+    return [normalize_term(token) for token in TOKEN_PATTERN.findall(text)
+            if token not in STOPWORDS and (len(token) > 1 or token.isdigit())]
+
+def question_terms(question):
+    """Termes d'une question : code, énoncé et texte des options."""
+    parts = [question.code, question.question]
+    parts.extend(option.text for option in question.options)
+    terms = []
+    for part in parts:
+        terms.extend(tokenize(part))
+    return terms
+
+class SearchIndex:
+    """Index inversé : terme -> [(document, fréquence)], documents = (id, code)."""
+
+    def __init__(self):
+        self.docs = []
+        self.lengths = []
+        self.postings = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, question):
+        """Ajoute une question à l'index ; retourne son numéro de document."""
+        doc = len(self.docs)
+        terms = question_terms(question)
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, []).append((doc, frequency))
+        self.docs.append((question.id, question.code or ''))
+        self.lengths.append(len(terms))
+        self._total_length += len(terms)
+        return doc
+
+    @classmethod
+    def build(cls, questions):
+        """Construit l'index d'une liste de questions."""
+        index = cls()
+        for question in questions:
+            index.add(question)
+        return index
+
+    def search(self, query, limit=10):
+        """Questions classées pour une requête : [{"id", "code", "score"}]."""
+        if not self.docs:
+            return []
+
+        count = len(self.docs)
+        average_length = self._total_length / count or 1
+        scores = {}
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [{"id": self.docs[doc][0], "code": self.docs[doc][1], "score": round(score, 4)}
+                for doc, score in ranked]
+
+    def to_dict(self):
+        """Forme sérialisable : postings aplaties [écart, fréquence, écart, ...]."""
+        terms = {}
+        for term in sorted(self.postings):
+            flat = []
+            previous = 0
+            for doc, frequency in self.postings[term]:
+                flat.extend((doc - previous, frequency))
+                previous = doc
+            terms[term] = flat
+        return {
+            "version": INDEX_VERSION,
+            "docs": [list(doc) for doc in self.docs],
+            "lengths": self.lengths,
+            "terms": terms
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstruit un index à partir de sa forme sérialisée."""
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"version d'index non prise en charge : {data.get('version')}")
+
+        index = cls()
+        index.docs = [tuple(doc) for doc in data["docs"]]
+        index.lengths = list(data["lengths"])
+        index._total_length = sum(index.lengths)
+        for term, flat in data["terms"].items():
+            postings = []
+            doc = 0
+            for position in range(0, len(flat), 2):
+                doc += flat[position]
+                postings.append((doc, flat[position + 1]))
+            index.postings[term] = postings
+        return index
+
+    def dumps(self):
+        """JSON minifié de l'index, en UTF-8."""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def load(cls, path):
+        """Charge un index sérialisé."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+def load_questions(path):
+    """Questions (QuizQuestion) d'un fichier de quiz."""
+    return load_quiz(path).questions
+
+def load_bundle_index(bundle_dir=DEFAULT_BUNDLE_DIR):
+    """Index référencé par le manifeste des paquets, ou None s'il n'y en a pas."""
+    try:
+        with open(Path(bundle_dir) / "manifest.json", 'r', encoding='utf-8') as f:
+            search = json.load(f).get("search")
+    except (OSError, ValueError):
+        return None
+    return SearchIndex.load(Path(bundle_dir) / search["file"]) if search else None
+
+def main(argv=None):
+    """Cherche des questions ; retourne le code de sortie (1 si aucun résultat)."""
+    parser = argparse.ArgumentParser(description="Recherche plein texte dans la banque de questions EPSF")
+    parser.add_argument('text', help="mots recherchés")
+    parser.add_argument('--index', help="fichier d'index (défaut : celui du manifeste de public/quiz/, "
+                                        f"sinon construit depuis {DEFAULT_INPUT})")
+    parser.add_argument('--input', default=str(DEFAULT_INPUT),
+                        help=f"banque indexée en l'absence d'index (défaut : {DEFAULT_INPUT})")
+    parser.add_argument('--limit', type=int, default=10, help="nombre maximal de résultats (défaut : 10)")
+    parser.add_argument('--json', action='store_true', help="écrire les résultats en JSON sur stdout")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex.load(args.index) if args.index else load_bundle_index()
+    if index is None:
+        index = SearchIndex.build(load_questions(args.input))
+
+    start = time.perf_counter()
+    results = index.search(args.text, args.limit)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        json.dump(results, sys.stdout, ensure_ascii=False)
+        sys.stdout.write('\n')
+    else:
+        for result in results:
+            print(f"{result['score']:8.3f}  #{result['id']:<5} {result['code']}")
+        print(f"{len(results)} résultat(s) en {elapsed * 1000:.3f} ms")
+    return 0 if results else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,18 @@
+// srcset par format, le PNG du champ image restant le format de repli
+export interface QuizImageSrcSet {
+  webp?: string;
+  avif?: string;
+}
+
 export interface QuizOption {
   id: string;
   text: string;
   image?: string; // URL ou chemin vers l'image de l'option (optionnel)
   imageAlt?: string; // Texte alternatif pour l'image de l'option (optionnel)
+  imageWidth?: number; // Largeur de l'image en pixels (optimize_images.py)
+  imageHeight?: number; // Hauteur de l'image en pixels (optimize_images.py)
+  imagePlaceholder?: string; // Aperçu flou en data URI (optimize_images.py)
+  imageSrcSet?: QuizImageSrcSet; // Versions optimisées de l'image (optimize_images.py)
 }
 
 export interface QuizQuestion {
@@ -14,6 +24,12 @@ export interface QuizQuestion {
   code?: string; // Code de la question (optionnel)
   image?: string; // URL ou chemin vers l'image d'illustration (optionnel)
   imageAlt?: string; // Texte alternatif pour l'image (optionnel)
+  imageWidth?: number; // Largeur de l'image en pixels (optimize_images.py)
+  imageHeight?: number; // Hauteur de l'image en pixels (optimize_images.py)
+  imagePlaceholder?: string; // Aperçu flou en data URI (optimize_images.py)
+  imageSrcSet?: QuizImageSrcSet; // Versions optimisées de l'image (optimize_images.py)
+  sourceId?: number; // Id de la question dans la banque (examens de generate_exams.py)
+  difficulty?: number; // Taux d'échec observé, de 0 à 1 (answer_stats.py)
 }
 
 export interface Quiz {
@@ -36,4 +52,63 @@ export interface QuizResult {
   totalQuestions: number;
   percentage: number;
   answers: UserAnswer[];
-}
\ No newline at end of file
+}
+
+// Paquets statiques produits par export_bundles.py (public/quiz/)
+export interface QuizShardInfo {
+  file: string; // Nom du paquet, contient un hash de son contenu (cache immuable)
+  family: string; // Famille de code (RSP, AEMC, ...)
+  count: number;
+  bytes: number;
+  ids: number[];
+}
+
+export interface QuizFamily {
+  name: string;
+  count: number;
+  shards: number[]; // Index dans QuizManifest.shards
+}
+
+export interface QuizManifest {
+  version: number;
+  title: string;
+  description: string;
+  total: number;
+  shardSize: number;
+  families: QuizFamily[];
+  shards: QuizShardInfo[];
+  search: QuizSearchInfo | null; // Index de recherche plein texte (search_index.py)
+}
+
+export interface QuizSearchInfo {
+  file: string; // Nom de l'index, contient un hash de son contenu
+  bytes: number;
+  terms: number;
+}
+
+export interface QuizShard {
+  family: string;
+  questions: QuizQuestion[];
+}
+
+// Examens blancs pré-calculés par generate_exams.py (public/exams/)
+export interface ExamData extends QuizData {
+  exam: {
+    seed: number;
+    index: number; // Numéro du tirage : (seed, index) reproduit l'examen
+  };
+}
+
+export interface ExamStratum {
+  family: string;
+  type: 'single' | 'multiple';
+  count: number; // Questions de la strate dans chaque examen
+}
+
+export interface ExamIndex {
+  version: number;
+  seed: number;
+  size: number;
+  strata: ExamStratum[];
+  exams: { file: string; index: number; bytes: number }[];
+}
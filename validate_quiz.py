@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Validation des fichiers de quiz JSON (src/data/*.json)
+
+Chaque fichier est vérifié en une seule passe sur ses questions, d'après le
+schéma de src/types/quiz.ts :
+- champs obligatoires, champs inconnus et types (QuizQuestion, QuizOption) ;
+- chaque id de correctAnswers existe dans options ;
+- le type correspond au nombre de réponses (single : 1, multiple : 2 ou plus) ;
+- ids uniques et continus de 1 à n, codes uniques ;
+- les images référencées existent dans public/.
+
+Le code de sortie est non nul si un fichier contient une erreur, pour
+pouvoir bloquer un build.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from quiz_model import OPTION_FIELDS, QUESTION_FIELDS, QUESTION_TYPES, type_name
+
+PUBLIC_DIR = Path("public")
+DEFAULT_FILES = ["src/data/questions_complete.json"]
+
+# Schéma de src/types/quiz.ts (quiz_model.py) : champ -> (obligatoire, types acceptés).
+# Le modèle s'arrête à la première erreur ; ici toutes les erreurs d'un fichier sont listées
+OPTION_SCHEMA = {field: (required, expected) for field, (_, required, expected) in OPTION_FIELDS.items()}
+QUESTION_SCHEMA = {field: (required, expected) for field, (_, required, expected) in QUESTION_FIELDS.items()}
+# Type des éléments des champs de type liste (les options sont vérifiées une à une)
+ITEM_TYPES = {"correctAnswers": str}
+
+def compile_schema(schema):
+    """Prépare un schéma pour la validation : (obligatoires, types par champ)."""
+    required = tuple(field for field, (is_required, _) in schema.items() if is_required)
+    types = {field: expected for field, (_, expected) in schema.items()}
+    return required, types
+
+COMPILED_OPTION_SCHEMA = compile_schema(OPTION_SCHEMA)
+COMPILED_QUESTION_SCHEMA = compile_schema(QUESTION_SCHEMA)
+
+def check_fields(item, compiled_schema, where, errors):
+    """Vérifie les champs obligatoires, les types et les éléments des listes d'un objet ; retourne False si invalide."""
+    if not isinstance(item, dict):
+        errors.append(f"{where}: objet attendu")
+        return False
+    
+    required, types = compiled_schema
+    valid = True
+    for field in required:
+        if field not in item:
+            errors.append(f"{where}: champ '{field}' manquant")
+            valid = False
+    for field, value in item.items():
+        expected = types.get(field)
+        if expected is None:
+            # Champ absent du schéma : refusé par quiz_model au chargement
+            errors.append(f"{where}: champ '{field}' inconnu")
+            valid = False
+        # bool est un sous-type d'int : un id à true n'est pas un id valide
+        elif not isinstance(value, expected) or isinstance(value, bool):
+            errors.append(f"{where}: '{field}' doit être de type {type_name(expected)}")
+            valid = False
+        elif field in ITEM_TYPES and not all(isinstance(element, ITEM_TYPES[field]) for element in value):
+            errors.append(f"{where}: '{field}' doit contenir des {ITEM_TYPES[field].__name__}")
+            valid = False
+    return valid
+
+class QuizValidator:
+    """Valide des fichiers de quiz ; les résultats sont des dictionnaires sérialisables."""
+    
+    def __init__(self, public_dir=PUBLIC_DIR, check_images=True):
+        self.public_dir = Path(public_dir)
+        self.check_images = check_images
+        # Existence des images, partagée entre les fichiers validés
+        self._image_exists = {}
+    
+    def image_exists(self, image_path):
+        """Indique si une image référencée (/images/...) existe dans public/."""
+        exists = self._image_exists.get(image_path)
+        if exists is None:
+            exists = (self.public_dir / image_path.lstrip('/')).is_file()
+            self._image_exists[image_path] = exists
+        return exists
+    
+    def validate_file(self, path):
+        """Valide un fichier de quiz et retourne son rapport."""
+        report = {
+            "file": str(path),
+            "valid": False,
+            "stats": {},
+            "errors": [],
+        }
+        errors = report["errors"]
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            errors.append(f"lecture impossible: {e}")
+            return report
+        
+        quiz = data.get('quiz') if isinstance(data, dict) else None
+        questions = quiz.get('questions') if isinstance(quiz, dict) else None
+        if not isinstance(questions, list):
+            errors.append("structure invalide: quiz.questions manquant")
+            return report
+        for field in ("title", "description"):
+            if not isinstance(quiz.get(field), str):
+                errors.append(f"quiz: champ '{field}' manquant ou invalide")
+        
+        report["stats"] = self._validate_questions(questions, errors)
+        report["valid"] = not errors
+        return report
+    
+    def _validate_questions(self, questions, errors):
+        """Parcourt une seule fois les questions et cumule statistiques et erreurs."""
+        counts = {"single": 0, "multiple": 0}
+        with_answers = 0
+        ids = set()
+        codes = {}
+        min_id = max_id = None
+        duplicate_ids = 0
+        images = 0
+        
+        for index, question in enumerate(questions):
+            where = f"question #{index + 1}"
+            if not check_fields(question, COMPILED_QUESTION_SCHEMA, where, errors):
+                continue
+            question_id = question["id"]
+            where = f"question {question_id} ({question.get('code', '?')})"
+            
+            # Ids : unicité et bornes (la continuité s'en déduit)
+            if question_id in ids:
+                errors.append(f"{where}: id dupliqué")
+                duplicate_ids += 1
+            ids.add(question_id)
+            min_id = question_id if min_id is None else min(min_id, question_id)
+            max_id = question_id if max_id is None else max(max_id, question_id)
+            
+            code = question.get("code")
+            if code is not None:
+                if code in codes:
+                    errors.append(f"{where}: code déjà utilisé par la question {codes[code]}")
+                else:
+                    codes[code] = question_id
+            
+            # Options et réponses
+            option_ids = set()
+            for option_index, option in enumerate(question["options"]):
+                option_where = f"{where}, option #{option_index + 1}"
+                if not check_fields(option, COMPILED_OPTION_SCHEMA, option_where, errors):
+                    continue
+                if option["id"] in option_ids:
+                    errors.append(f"{option_where}: id d'option '{option['id']}' dupliqué")
+                option_ids.add(option["id"])
+                if "image" in option:
+                    images += 1
+                    if self.check_images and not self.image_exists(option["image"]):
+                        errors.append(f"{option_where}: image introuvable {option['image']}")
+            
+            if not question["options"]:
+                errors.append(f"{where}: aucune option")
+            
+            answers = question["correctAnswers"]
+            if answers:
+                with_answers += 1
+            else:
+                errors.append(f"{where}: aucune réponse correcte")
+            for answer in answers:
+                if answer not in option_ids:
+                    errors.append(f"{where}: réponse '{answer}' absente des options")
+            
+            question_type = question["type"]
+            if question_type not in QUESTION_TYPES:
+                errors.append(f"{where}: type '{question_type}' inconnu")
+            else:
+                counts[question_type] += 1
+                if answers and (question_type == "single") != (len(answers) == 1):
+                    errors.append(f"{where}: type '{question_type}' incohérent avec {len(answers)} réponse(s)")
+            
+            if "image" in question:
+                images += 1
+                if self.check_images and not self.image_exists(question["image"]):
+                    errors.append(f"{where}: image introuvable {question['image']}")
+        
+        total = len(questions)
+        continuous = duplicate_ids == 0 and len(ids) == total and (total == 0 or (min_id == 1 and max_id == total))
+        if not continuous:
+            errors.append(f"ids non continus de 1 à {total}")
+        
+        return {
+            "total": total,
+            "single": counts["single"],
+            "multiple": counts["multiple"],
+            "unique_ids": len(ids),
+            "continuous_ids": continuous,
+            "unique_codes": len(codes),
+            "with_answers": with_answers,
+            "images": images,
+        }
+
+def print_report(report):
+    """Affiche le rapport d'un fichier sous forme lisible."""
+    stats = report["stats"]
+    print(f"📄 {report['file']}")
+    if stats:
+        print(f"Total questions: {stats['total']}")
+        print(f"Questions à choix unique: {stats['single']}")
+        print(f"Questions à choix multiple: {stats['multiple']}")
+        print(f"Codes uniques: {stats['unique_codes']}")
+        print(f"IDs uniques: {stats['unique_ids']}")
+        print(f"IDs continus (1 à {stats['total']}): {stats['continuous_ids']}")
+        print(f"Questions avec réponses correctes: {stats['with_answers']}")
+        print(f"Images référencées: {stats['images']}")
+    
+    if report["valid"]:
+        print("\n✅ Vérification terminée avec succès!")
+    else:
+        print(f"\n❌ {len(report['errors'])} erreur(s) :")
+        for error in report["errors"]:
+            print(f"  - {error}")
+
+def main(argv=None):
+    """Valide les fichiers donnés ; retourne le code de sortie."""
+    parser = argparse.ArgumentParser(description="Validation des fichiers de quiz EPSF")
+    parser.add_argument('files', nargs='*', default=DEFAULT_FILES,
+                        help=f"fichiers de quiz à valider (défaut : {' '.join(DEFAULT_FILES)})")
+    parser.add_argument('--json', action='store_true',
+                        help="écrire les rapports en JSON sur stdout")
+    parser.add_argument('--public-dir', default=str(PUBLIC_DIR),
+                        help="répertoire où chercher les images (défaut : public)")
+    parser.add_argument('--no-images', action='store_true',
+                        help="ne pas vérifier l'existence des images")
+    args = parser.parse_args(argv)
+    
+    validator = QuizValidator(args.public_dir, check_images=not args.no_images)
+    reports = [validator.validate_file(path) for path in args.files]
+    
+    if args.json:
+        json.dump({"valid": all(r["valid"] for r in reports), "files": reports},
+                  sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for index, report in enumerate(reports):
+            if index:
+                print()
+            print_report(report)
+    
+    return 0 if all(report["valid"] for report in reports) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())